@@ -0,0 +1,130 @@
+import math
+import settings
+
+# Audio backends behind HardwareManager.start_tone / stop_tone / play_song.
+#
+#   PWMAudio    square wave on the buzzer pin, switched from the main loop
+#   SynthAudio  synthio rendered through audiopwmio: tones get an envelope
+#               and two voices, and play_song() hands a whole song to a
+#               synthio.MidiTrack that plays in the background
+#
+# play_song(notes, delay_ms) takes (start_ms, length_ms, freq, freq2)
+# tuples, times from the song start, which is delay_ms from now. It
+# returns False if the backend can't play in the background; the caller
+# then times every note itself with start_tone / stop_tone.
+
+_MIDI_TICKS_PER_S = 1000  # MidiTrack tempo: one tick per ms
+
+
+class PWMAudio:
+    """The buzzer is active low: SILENCE_DUTY holds the pin high."""
+    PLAY_DUTY = 49152
+    SILENCE_DUTY = 65535
+
+    def __init__(self, pin):
+        import pwmio
+        self.buzzer = pwmio.PWMOut(pin, duty_cycle=self.SILENCE_DUTY, frequency=440, variable_frequency=True)
+
+    def start_tone(self, freq, freq2=0):
+        # One voice only: freq2 is dropped
+        if freq > 0:
+            self.buzzer.frequency = freq
+            self.buzzer.duty_cycle = self.PLAY_DUTY
+        else:
+            self.buzzer.duty_cycle = self.SILENCE_DUTY
+
+    def stop_tone(self):
+        self.buzzer.duty_cycle = self.SILENCE_DUTY
+
+    def play_song(self, notes, delay_ms):
+        return False
+
+    def stop_song(self):
+        pass
+
+
+def midi_key(freq):
+    return round(69 + 12 * math.log(freq / 440) / math.log(2))
+
+
+def _varlen(out, value):
+    # MIDI variable-length quantity, 7 bits per byte, high bit = more
+    shift = 21
+    while shift and not value >> shift:
+        shift -= 7
+    while shift:
+        out.append(0x80 | (value >> shift) & 0x7F)
+        shift -= 7
+    out.append(value & 0x7F)
+
+
+def song_midi(notes, delay_ms):
+    # One MIDI stream (1 tick = 1 ms) for the whole song: on/off events in
+    # time order, each note's off coming before the next note's on
+    data = bytearray()
+    last = -delay_ms
+    for start, length, freq, freq2 in notes:
+        keys = [midi_key(f) for f in (freq, freq2) if f > 0]
+        for when, status, velocity in ((start, 0x90, 100), (start + length, 0x80, 0)):
+            for key in keys:
+                _varlen(data, when - last)
+                last = when
+                data.append(status)
+                data.append(key)
+                data.append(velocity)
+    return data
+
+
+class SynthAudio:
+    def __init__(self, pin):
+        import synthio
+        import audiopwmio
+        self.synthio = synthio
+        a, d, r, level, sustain = settings.SYNTH_ENVELOPE
+        self.envelope = synthio.Envelope(attack_time=a, decay_time=d, release_time=r,
+                                         attack_level=level, sustain_level=sustain)
+        self.synth = synthio.Synthesizer(sample_rate=settings.SYNTH_SAMPLE_RATE,
+                                         envelope=self.envelope)
+        self.out = audiopwmio.PWMAudioOut(pin)
+        self.out.play(self.synth, loop=True)
+        self.track = None
+        self.held = []
+
+    def start_tone(self, freq, freq2=0):
+        self.stop_tone()
+        if self.track:
+            self.stop_song()
+        for f in (freq, freq2):
+            if f > 0:
+                note = self.synthio.Note(frequency=f)
+                self.synth.press(note)
+                self.held.append(note)
+
+    def stop_tone(self):
+        if self.held:
+            self.synth.release(self.held)
+            self.held = []
+
+    def play_song(self, notes, delay_ms):
+        self.stop_tone()
+        self.track = self.synthio.MidiTrack(song_midi(notes, delay_ms), tempo=_MIDI_TICKS_PER_S,
+                                            sample_rate=settings.SYNTH_SAMPLE_RATE,
+                                            envelope=self.envelope)
+        self.out.play(self.track)
+        return True
+
+    def stop_song(self):
+        # Back to the live synthesizer for menu tones
+        if self.track:
+            self.out.stop()
+            self.track = None
+            self.out.play(self.synth, loop=True)
+
+
+def make_audio(pin, backend=settings.AUDIO_BACKEND):
+    if backend == "synthio":
+        try:
+            return SynthAudio(pin)
+        except (ImportError, ValueError, RuntimeError) as e:
+            print(f"synthio audio unavailable ({e}), using PWM")
+    return PWMAudio(pin)
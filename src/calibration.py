@@ -0,0 +1,33 @@
+import struct
+import settings
+from highscores import crc8
+
+# Sensor baselines cached in NVM, so boot can skip calibrating:
+# magic, accelerometer X offset (m/s^2), raw baseline of each touch pad
+# (MOVE_TOUCH_1..4), then a CRC-8 of everything before it. A bad magic
+# or CRC means "not calibrated yet".
+CAL_MAGIC = b'C1'
+CAL_FORMAT = '<2sf4H'
+CAL_SIZE = struct.calcsize(CAL_FORMAT) + 1
+
+
+class CalibrationStore:
+    def __init__(self, nvm, offset=settings.NVM_CALIBRATION):
+        self.nvm = nvm
+        self.offset = offset
+
+    def load(self):
+        # (accel_x, [touch baselines]) or None
+        data = bytes(self.nvm[self.offset:self.offset + CAL_SIZE])
+        if data[:2] != CAL_MAGIC or crc8(data[:-1]) != data[-1]:
+            return None
+        values = struct.unpack(CAL_FORMAT, data[:-1])
+        return values[1], list(values[2:])
+
+    def save(self, accel_x, baselines):
+        record = bytearray(struct.pack(CAL_FORMAT, CAL_MAGIC, accel_x, *baselines))
+        record.append(crc8(record))
+        # One slice write; skipped when nothing changed, to spare the flash
+        if bytes(self.nvm[self.offset:self.offset + CAL_SIZE]) != record:
+            self.nvm[self.offset:self.offset + CAL_SIZE] = record
+            print("Calibration saved")
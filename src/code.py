@@ -1,11 +1,10 @@
-import time
-import board
-import microcontroller
-import struct
+import asyncio
 import settings
 import songs
-from hardware import HardwareManager
 from game_engine import RhythmGame
+from scheduler import Scheduler
+from replay import ReplayRecorder, ReplayPlayer
+from highscores import HighScoreManager
 
 STATE_SPLASH = 0
 STATE_MENU_DIFFICULTY = 1
@@ -14,135 +13,206 @@ STATE_PLAYING = 3
 STATE_GAME_OVER = 4
 STATE_HIGHSCORE_ENTRY = 5
 STATE_HIGHSCORE_VIEW = 6
-
-class HighScoreManager:
-    HEADER = b'\xBE\xF1'  
-    MAX_ENTRIES = 6
-    ENTRY_SIZE = 7 
-    OFFSET = 0 
-
-    def __init__(self):
-        self.nvm = microcontroller.nvm
-        if self.nvm[0:2] != self.HEADER:
-            self._reset_nvm()
-
-    def _reset_nvm(self):
-        print("Initializing High Scores...")
-        self.nvm[0:2] = self.HEADER
-        empty_data = (b'GIX', 100)
-        for i in range(self.MAX_ENTRIES):
-            self._write_entry(i, *empty_data)
-
-    def _write_entry(self, index, name_bytes, score):
-        start = 2 + index * self.ENTRY_SIZE
-        data = struct.pack('<3sI', name_bytes, score)
-        self.nvm[start : start + self.ENTRY_SIZE] = data
-
-    def get_high_scores(self):
-        scores = []
-        for i in range(self.MAX_ENTRIES):
-            start = 2 + i * self.ENTRY_SIZE
-            data = self.nvm[start : start + self.ENTRY_SIZE]
-            try:
-                name, score = struct.unpack('<3sI', data)
-                decoded_name = name.decode('utf-8').rstrip('\x00')
-                scores.append((decoded_name, score))
-            except Exception as e:
-                print(f"Error reading score {i}: {e}")
-                scores.append(("ERR", 0))
-                
-        scores.sort(key=lambda x: x[1], reverse=True)
-        return scores
-
-    def add_score(self, name_str, score):
-        current_scores = self.get_high_scores()
-        current_scores.append((name_str, score))
-        current_scores.sort(key=lambda x: x[1], reverse=True)
-        current_scores = current_scores[:self.MAX_ENTRIES]
-        
-        for i, (n, s) in enumerate(current_scores):
-            self._write_entry(i, n.encode('utf-8'), s)
+STATE_DEBUG = 7
 
 class GameApp:
-    def __init__(self):
-        self.hw = HardwareManager()
-        self.hs_manager = HighScoreManager()
+    def __init__(self, hw=None, nvm=None):
+        # hw: any HardwareBase backend (sim_hardware for running on a PC)
+        if hw is None:
+            from hardware import HardwareManager
+            hw = HardwareManager(nvm)
+        self.hw = hw
+        self.hs_manager = HighScoreManager(nvm)
         self.state = STATE_SPLASH
         
         self.difficulty = settings.DIFFICULTY_EASY
         self.current_level_index = 0 
         self.session_score = 0      
+        self.session_runs = []      # (level, difficulty, score) of each finished run
+        self.hs_view_idx = 0        # board selected in the high score view
         self.current_game_engine = None
         self.last_level_score = 0   
+
+        # Judged inputs of the last run; replay_mode plays them back instead
+        self.recorder = ReplayRecorder()
+        self.replay_mode = False
+
+        # Encoder / button events gathered by _input_loop()
+        self.input_event = asyncio.Event()
+        self.pending_delta = 0
+        self.pending_presses = 0
+        self.pending_since = 0
+        self.latency_max = 0
+        self.latency_total = 0
+        self.latency_count = 0
+
+        # Latest screen layers, drawn by _screen_loop()
+        self.pending_layers = None
+        self.screen_event = asyncio.Event()
+
     def run(self):
+        asyncio.run(self.main())
+
+    async def main(self):
+        asyncio.create_task(self._input_loop())
+        asyncio.create_task(self._screen_loop())
+
+        handlers = {
+            STATE_SPLASH: self.do_splash,
+            STATE_MENU_DIFFICULTY: self.do_menu_difficulty,
+            STATE_MENU_LEVEL: self.do_menu_level,
+            STATE_PLAYING: self.do_playing,
+            STATE_GAME_OVER: self.do_game_over,
+            STATE_HIGHSCORE_ENTRY: self.do_highscore_entry,
+            STATE_HIGHSCORE_VIEW: self.do_highscore_view,
+            STATE_DEBUG: self.do_debug,
+        }
         while True:
-            if self.state == STATE_SPLASH:
-                self.do_splash()
-            elif self.state == STATE_MENU_DIFFICULTY:
-                self.do_menu_difficulty()
-            elif self.state == STATE_MENU_LEVEL:
-                self.do_menu_level()
-            elif self.state == STATE_PLAYING:
-                self.do_playing()
-            elif self.state == STATE_GAME_OVER:
-                self.do_game_over()
-            elif self.state == STATE_HIGHSCORE_ENTRY:
-                self.do_highscore_entry()
-            elif self.state == STATE_HIGHSCORE_VIEW:
-                self.do_highscore_view()
-            time.sleep(0.01)
-
-    def do_splash(self):
-        self.hw.display_layers([
-            {'text': "GIX", 'scale': 3, 'y': 20},
-            {'text': "RHYTHM", 'scale': 2, 'y': 50}
-        ])
-        self.hw.play_tone(440, 0.1)
-        self.hw.play_tone(554, 0.1)
-        self.hw.play_tone(659, 0.2)
-        
+            await handlers[self.state]()
+            await asyncio.sleep(0)
+
+    # --- Background tasks ---
+
+    async def _input_loop(self):
+        while True:
+            self.hw.tones.tick()
+            if self.state != STATE_PLAYING:
+                self.hw.idle()
+            delta = self.hw.get_encoder_delta()
+            pressed = self.hw.is_button_pressed()
+            if delta or pressed:
+                if not self.input_event.is_set():
+                    self.pending_since = self.hw.ticks_ms()
+                self.pending_delta += delta
+                if pressed:
+                    self.pending_presses += 1
+                self.input_event.set()
+            await asyncio.sleep(settings.INPUT_POLL_INTERVAL)
+
+    async def _screen_loop(self):
+        while True:
+            await self.screen_event.wait()
+            self.screen_event.clear()
+            layers = self.pending_layers
+            self.pending_layers = None
+            if layers:
+                self.hw.display_layers(layers)
+
+    async def _splash_leds(self):
         for i in range(10):
             color = settings.GRADIENT_BLUE[i % 4]
-            self.hw.pixels.fill((0,0,0))
+            self.hw.frame.clear()
             self.hw.set_pixel_segment(i, i+5, color)
-            time.sleep(0.05)
+            await asyncio.sleep(0.05)
+        self.hw.set_leds((0,0,0))
+
+    # --- Helpers used by the states ---
+
+    def show(self, layers):
+        self.pending_layers = layers
+        self.screen_event.set()
+
+    def play_tones(self, *tones, replace=False):
+        # (freq, seconds) pairs, played by hw.tones while input keeps polling
+        self.hw.tones.play(*tones, replace=replace)
+
+    def drain_input(self):
+        self.input_event.clear()
+        self.pending_delta = 0
+        self.pending_presses = 0
+
+    async def wait_input(self, timeout=None):
+        # Returns (encoder steps, button presses) since the last call
+        if timeout is None:
+            await self.input_event.wait()
+        else:
+            try:
+                await asyncio.wait_for(self.input_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return 0, 0
+
+        latency = self.hw.ticks_ms() - self.pending_since
+        self.latency_total += latency
+        self.latency_count += 1
+        if latency > self.latency_max:
+            self.latency_max = latency
+
+        delta = self.pending_delta
+        presses = self.pending_presses
+        self.drain_input()
+        return delta, presses
+
+    async def _button_held(self, ms):
+        # True if the button stays down for `ms` from now
+        start = self.hw.ticks_ms()
+        while self.hw.is_button_down():
+            if self.hw.ticks_ms() - start >= ms:
+                return True
+            await asyncio.sleep(0.02)
+        return False
+
+    def print_input_latency(self):
+        if self.latency_count:
+            avg_ms = self.latency_total / self.latency_count
+            print(f"Input latency: avg {avg_ms:.1f}ms, max {self.latency_max}ms")
+
+    # --- States ---
+
+    async def do_splash(self):
+        self.show([
+            {'text': "GIX", 'scale': 3, 'y': 20},
+            {'text': "RHYTHM", 'scale': 2, 'y': 50}
+        ])
+        self.play_tones((440, 0.1), (554, 0.1), (659, 0.2))
+        leds = asyncio.create_task(self._splash_leds())
         
+        # Any input skips the rest of the splash
+        await self.wait_input(timeout=1.4)
+        leds.cancel()
         self.hw.set_leds((0,0,0))
-        time.sleep(0.5)
         self.state = STATE_MENU_DIFFICULTY
 
-    def _run_menu(self, title, items, start_idx=0):
+    async def _run_menu(self, title, items, start_idx=0, get_item=None):
+        # With get_item, items is the item count and labels are built only
+        # for the lines on screen
         selected = start_idx
-        num_items = len(items)
+        num_items = items if get_item else len(items)
         
         # 首次渲染
-        self._render_menu(title, items, selected)
+        self.drain_input()
+        self._render_menu(title, items, selected, get_item)
         
         while True:
-            delta = self.hw.get_encoder_delta()
+            delta, presses = await self.wait_input()
+
+            # Steps turned just before a press still count
             if delta != 0:
                 selected = (selected + delta) % num_items
-                self._render_menu(title, items, selected)
-                self.hw.play_tone(880, 0.05) # 导航音效
 
-            if self.hw.is_button_pressed():
-                self.hw.play_tone(1760, 0.1) # 确认音效
+            if presses:
+                self.play_tones((1760, 0.1), replace=True) # 确认音效
+                self.print_input_latency()
                 return selected
-            
-            time.sleep(0.05)
 
-    def _render_menu(self, title, items, selected):
-        num_items = len(items)
+            if delta != 0:
+                self._render_menu(title, items, selected, get_item)
+                self.play_tones((880, 0.05), replace=True) # 导航音效
+
+    def _render_menu(self, title, items, selected, get_item=None):
+        num_items = items if get_item else len(items)
         if num_items == 0:
             return
+        if get_item is None:
+            # Not items.__getitem__: CircuitPython lists don't expose it
+            get_item = lambda i: items[i]
 
         idx_prev = (selected - 1) % num_items 
         idx_curr = selected
         idx_next = (selected + 1) % num_items
         
-        text_prev = items[idx_prev]
-        text_curr = f"> {items[idx_curr]} <" 
-        text_next = items[idx_next]
+        text_prev = get_item(idx_prev)
+        text_curr = f"> {get_item(idx_curr)} <" 
+        text_next = get_item(idx_next)
         
         # Title: y=5 
         # Prev:  y=20 
@@ -159,26 +229,39 @@ class GameApp:
             {'text': text_next, 'scale': 1, 'y': 50}
         ]
         
-        self.hw.display_layers(layers)
+        self.show(layers)
 
-    def do_menu_difficulty(self):
+    async def do_menu_difficulty(self):
         self.session_score = 0
+        self.session_runs = []
         
-        options = ["EASY", "NORMAL", "HARD", "High Scores"]
-        idx = self._run_menu("SELECT DIFFICULTY", options)
+        options = ["EASY", "NORMAL", "HARD", "High Scores", "Replay"]
+        idx = await self._run_menu("SELECT DIFFICULTY", options)
         
-        if idx == 3:
+        # Hidden: keep the button held to open the debug screen
+        if await self._button_held(settings.DEBUG_HOLD_MS):
+            self.state = STATE_DEBUG
+        elif idx == 3:
             self.state = STATE_HIGHSCORE_VIEW
+        elif idx == 4:
+            if self.recorder.load(self.hs_manager.nvm):
+                self.difficulty = self.recorder.difficulty
+                self.current_level_index = self.recorder.level - 1
+                self.replay_mode = True
+                self.state = STATE_PLAYING
+            else:
+                self.show([{'text': "NO REPLAY", 'scale': 2, 'y': 32}])
+                await asyncio.sleep(1.0)
         else:
             self.difficulty = idx 
             self.state = STATE_MENU_LEVEL
 
-    def do_menu_level(self):
-        total_songs = len(songs.SONG_LIBRARY)
+    async def do_menu_level(self):
+        total_songs = songs.level_count()
         options = [f"Level {i+1}" for i in range(total_songs)]
         options.append("Back")
         
-        idx = self._run_menu("SELECT LEVEL", options)
+        idx = await self._run_menu("SELECT LEVEL", options)
         
         if idx == len(options) - 1:
             self.state = STATE_MENU_DIFFICULTY
@@ -186,67 +269,102 @@ class GameApp:
             self.current_level_index = idx
             self.state = STATE_PLAYING
 
-    def do_playing(self):
+    async def do_playing(self):
         level_data = songs.get_level_data(self.current_level_index + 1)
         if not level_data:
             print("Error: No level data")
             self.state = STATE_MENU_DIFFICULTY
             return
 
-        self.current_game_engine = RhythmGame(self.hw, level_data, self.difficulty)
+        engine = RhythmGame(self.hw, level_data, self.difficulty)
+        self.hw.start_sensors()
+        self.hw.configure_double_tap(self.difficulty)
+        self.current_game_engine = engine
         
+        # A button press skips the rest of the countdown
+        self.drain_input()
         for i in range(3, 0, -1):
-            self.hw.display_layers([
+            self.show([
                 {'text': f"Level {self.current_level_index + 1}", 'scale': 1, 'y': 10},
                 {'text': str(i), 'scale': 4, 'y': 40}
             ])
-            self.hw.play_tone(440, 0.1)
-            time.sleep(0.8)
+            self.play_tones((440, 0.1))
+            _, presses = await self.wait_input(timeout=0.9)
+            if presses:
+                break
         
-        self.current_game_engine.start()
+        scheduler = Scheduler(clock=self.hw.ticks_us)
+        engine.register_tasks(scheduler)
+        # A skipped countdown can leave its frame queued for _screen_loop
+        self.pending_layers = None
+        engine.start()
+        if self.replay_mode:
+            player = ReplayPlayer(self.recorder, self.hw)
+            player.start(engine.start_time)
+            engine.input = player
+        else:
+            self.recorder.start(engine.start_time, self.current_level_index + 1, self.difficulty)
+            engine.recorder = self.recorder
+        scheduler.start()
         
-        while True:
-            self.current_game_engine.update()
-            
-            if self.current_game_engine.is_game_over:
-                self.hw.play_tone(100, 0.5)
-                self.state = STATE_GAME_OVER
-                break
-                
-            if self.current_game_engine.is_won:
-                self.hw.play_tone(1000, 0.2)
-                time.sleep(0.1)
-                self.hw.play_tone(1200, 0.4)
-                self.state = STATE_GAME_OVER
-                break
+        while not (engine.is_game_over or engine.is_won):
+            scheduler.run_once()
+            await asyncio.sleep(0)
+
+        scheduler.print_stats()
+        if not self.replay_mode:
+            self.recorder.finish(engine.score, engine.max_combo)
+            print(f"Replay: {self.recorder.count} records, {self.recorder.size_bytes()} bytes")
+
+        if engine.is_game_over:
+            self.play_tones((100, 0.5))
+        else:
+            self.play_tones((1000, 0.2), (0, 0.1), (1200, 0.4))
+        self.state = STATE_GAME_OVER
                 
-    def do_game_over(self):
+    async def do_game_over(self):
         engine = self.current_game_engine
+        if self.replay_mode:
+            await self._replay_result(engine)
+            return
+
         is_win = engine.is_won
         self.last_level_score = int(engine.score)
+        self.session_runs.append((self.current_level_index + 1, self.difficulty, self.last_level_score))
         total_now = self.session_score + self.last_level_score
         
         title = "CLEARED!" if is_win else "GAME OVER"
-        self.hw.display_layers([
+        self.show([
             {'text': title, 'scale': 2, 'y': 10},
             {'text': f"Score: {self.last_level_score}", 'scale': 1, 'y': 30},
             {'text': f"Total: {total_now}", 'scale': 1, 'y': 45},
             {'text': f"Max Combo: {engine.combo}", 'scale': 1, 'y': 60}
         ])
         
-        time.sleep(1.0) 
-        while not self.hw.is_button_pressed():
-            time.sleep(0.1)
+        await asyncio.sleep(1.0) 
+        self.drain_input()
+        while True:
+            _, presses = await self.wait_input()
+            if presses:
+                break
             
         menu_options = ["Retry Level", "Save & Quit"]
         
         can_next = is_win and (self.current_level_index < settings.MAX_GAME_LEVELS - 1)
         if can_next:
             menu_options.insert(1, "Next Level")
+        if not self.recorder.overflowed:
+            menu_options.append("Save Replay")
         
-        idx = self._run_menu("RESULT MENU", menu_options)
-        
-        choice = menu_options[idx]
+        while True:
+            idx = await self._run_menu("RESULT MENU", menu_options)
+            choice = menu_options[idx]
+            if choice != "Save Replay":
+                break
+            self.recorder.save(self.hs_manager.nvm)
+            menu_options.remove(choice)
+            self.show([{'text': "SAVED!", 'scale': 3, 'y': 32}])
+            await asyncio.sleep(1.0)
         
         if choice == "Retry Level":
             self.state = STATE_PLAYING
@@ -258,13 +376,45 @@ class GameApp:
             
         elif choice == "Save & Quit":
             self.session_score += self.last_level_score
-            self.state = STATE_HIGHSCORE_ENTRY
+            if self._made_a_board():
+                self.state = STATE_HIGHSCORE_ENTRY
+            else:
+                self.state = STATE_HIGHSCORE_VIEW
 
-    def do_highscore_entry(self):
+    def _made_a_board(self):
+        # Session total on the overall board, or any run on its level board
+        if self.hs_manager.is_high_score(self.session_score):
+            return True
+        for level, difficulty, score in self.session_runs:
+            if self.hs_manager.board(level, difficulty).is_high_score(score):
+                return True
+        return False
+
+    async def _replay_result(self, engine):
+        # Playback should land on exactly the recorded result
+        rec = self.recorder
+        match = engine.score == rec.score and engine.max_combo == rec.max_combo
+        print(f"Replay: score {engine.score}/{rec.score}, max combo {engine.max_combo}/{rec.max_combo}")
+        self.show([
+            {'text': "REPLAY OK" if match else "MISMATCH", 'scale': 2, 'y': 10},
+            {'text': f"Score: {engine.score}/{rec.score}", 'scale': 1, 'y': 30},
+            {'text': f"Max Combo: {engine.max_combo}/{rec.max_combo}", 'scale': 1, 'y': 45},
+        ])
+        self.replay_mode = False
+        await asyncio.sleep(1.0)
+        self.drain_input()
+        while True:
+            _, presses = await self.wait_input()
+            if presses:
+                break
+        self.state = STATE_MENU_DIFFICULTY
+
+    async def do_highscore_entry(self):
         final_score = self.session_score
         initials = [65, 65, 65] # ASCII 'A', 'A', 'A'
         cursor = 0
         
+        self.drain_input()
         need_refresh = True
         
         while cursor < 3:
@@ -272,7 +422,7 @@ class GameApp:
                 char_str = "".join([chr(c) for c in initials])
                 indicator = " " * cursor + "^" + " " * (2-cursor)
                 
-                self.hw.display_layers([
+                self.show([
                     {'text': "NEW RECORD!", 'scale': 1, 'y': 10},
                     {'text': f"Score: {final_score}", 'scale': 1, 'y': 25},
                     {'text': char_str, 'scale': 3, 'y': 45},
@@ -280,44 +430,92 @@ class GameApp:
                 ])
                 need_refresh = False 
 
-            delta = self.hw.get_encoder_delta()
+            delta, presses = await self.wait_input()
             if delta != 0:
                 initials[cursor] += delta
                 if initials[cursor] > 90: initials[cursor] = 65
                 if initials[cursor] < 65: initials[cursor] = 90
                 need_refresh = True 
             
-            if self.hw.is_button_pressed():
-                self.hw.play_tone(1760, 0.1)
+            if presses:
+                self.play_tones((1760, 0.1), replace=True)
                 cursor += 1
                 need_refresh = True 
-                time.sleep(0.2) 
-
-            time.sleep(0.05)
             
         name = "".join([chr(c) for c in initials])
         self.hs_manager.add_score(name, final_score)
+        for level, difficulty, score in self.session_runs:
+            self.hs_manager.board(level, difficulty).add_score(name, score)
+        self.session_runs = []
         
-        self.hw.display_layers([
+        self.show([
             {'text': "SAVED!", 'scale': 3, 'y': 32}
         ])
-        time.sleep(1.5)
+        await asyncio.sleep(1.5)
         self.state = STATE_HIGHSCORE_VIEW
 
-    def do_highscore_view(self):
-        scores = self.hs_manager.get_high_scores()
-        
+    async def do_debug(self):
+        # Profiler counters from the last song: phase, avg us, max us.
+        # Turn the knob to switch profiling on/off, press to go back.
+        self.drain_input()
+        while True:
+            prof = self.hw.profiler
+            if prof:
+                lines = prof.report_lines()
+            else:
+                lines = ["turn: profile on", "press: back"]
+            layers = [{'text': f"PROFILE {'ON' if prof else 'OFF'}", 'scale': 1, 'y': 4}]
+            for i, line in enumerate(lines):
+                # 8 px rows: all seven phases fit under the title
+                layers.append({'text': line, 'scale': 1, 'x': 0, 'y': 12 + i * 8})
+            self.show(layers)
+
+            delta, presses = await self.wait_input()
+            if presses:
+                self.state = STATE_MENU_DIFFICULTY
+                return
+            if delta:
+                self.hw.set_profiling(not prof)
+
+    def _board_label(self, i):
+        # Row i of the board list: overall, then every (level, difficulty)
+        # board with its leader, then Back. Boards are read only when shown.
+        if i == 0:
+            name, s = self.hs_manager.get_high_scores()[0]
+            return f"ALL {name} {s}"
+        if i > HighScoreManager.NUM_BOARDS:
+            return "[ Back ]"
+        level, difficulty = divmod(i - 1, len(settings.DIFFICULTY_NAMES))
+        name, s = self.hs_manager.board(level + 1, difficulty).get_high_scores()[0]
+        return f"L{level + 1} {settings.DIFFICULTY_NAMES[difficulty][0]} {name} {s}"
+
+    async def do_highscore_view(self):
+        count = HighScoreManager.NUM_BOARDS + 2
+        idx = await self._run_menu("HIGH SCORES", count, self.hs_view_idx, self._board_label)
+        if idx == count - 1:
+            self.hs_view_idx = 0
+            self.state = STATE_MENU_DIFFICULTY
+            return
+        self.hs_view_idx = idx
+
+        if idx == 0:
+            title = "ALL LEVELS"
+            scores = self.hs_manager.get_high_scores()
+        else:
+            level, difficulty = divmod(idx - 1, len(settings.DIFFICULTY_NAMES))
+            title = f"LEVEL {level + 1} {settings.DIFFICULTY_NAMES[difficulty]}"
+            scores = self.hs_manager.board(level + 1, difficulty).get_high_scores()
+
         items = []
         for i, (name, s) in enumerate(scores):
             items.append(f"{i+1}. {name}  {s}")
             
         items.append("[ Back ]")
         
-        self._run_menu("HIGH SCORES", items)
-        
-        self.state = STATE_MENU_DIFFICULTY
+        await self._run_menu(title, items)
+        # Back to the board list, on the board just viewed
+        self.state = STATE_HIGHSCORE_VIEW
 
 if __name__ == "__main__":
     game = GameApp()
     game.run()
-
@@ -1,91 +1,158 @@
-import time
+import array
 import settings
+from songs import NOTE_FREQS, CHART_RECORD_SIZE
+from lane_map import LaneMap, NO_PIXEL
+from profiler import PHASE_AUDIO, PHASE_MISSES, PHASE_VISUALS, PHASE_INPUT
+from timing_wheel import TimingWheel, EV_NOTE_ON, EV_NOTE_OFF
+from led_track import LedTrack, OFF
+
+# Lowest move id contained in a required-moves bitmask (bit n = move n)
+_FIRST_MOVE = bytearray(256)
+for _mask in range(1, 256):
+    _m = 0
+    while not (_mask >> _m) & 1:
+        _m += 1
+    _FIRST_MOVE[_mask] = _m
 
 class RhythmGame:
-    def __init__(self, hardware, song_data, difficulty=settings.DIFFICULTY_EASY):
+    def __init__(self, hardware, song_data, difficulty=settings.DIFFICULTY_EASY,
+                 led_keyframes=settings.LED_KEYFRAMES):
         self.hw = hardware
         self.song_data = song_data
         
-        self.score = 0
+        # Fixed point: score_fp is in 1/SCORE_SCALE points
+        self.score_fp = 0
         self.combo = 0 
         self.max_combo = 0
         self.is_game_over = False
         self.is_won = False
         
-        self.tick_duration = settings.DURATION[difficulty]
-        self.look_ahead_time = 7 * self.tick_duration 
+        # All times are integer milliseconds (hw.ticks_ms), so judgement
+        # does not lose resolution as uptime grows
+        self.lanes = LaneMap()
+        self.tick_duration = round(settings.DURATION[difficulty] * 1000)
+        self.look_ahead_time = self.lanes.row_length * self.tick_duration 
         self.bpm_scale = settings.BPM[difficulty]
         self.score_factor = settings.SCORE_FACTOR[difficulty]   
         
-        base_qn_duration = settings.QN * self.bpm_scale
+        base_qn_duration = round(settings.QN * self.bpm_scale * 1000)
         
-        self.good_window = base_qn_duration / 2.5
+        self.good_window = base_qn_duration * 2 // 5
         
-        self.perfect_window = self.good_window / 2.0
+        self.perfect_window = self.good_window // 2
         
         print(f"Difficulty: {settings.DIFFICULTY_NAMES[difficulty]}")
-        print(f"Beat Duration: {base_qn_duration:.3f}s")
-        print(f"Windows -> Good: +/-{self.good_window:.3f}s, Perfect: +/-{self.perfect_window:.3f}s")
-
-        self.timeline = [] 
+        print(f"Beat Duration: {base_qn_duration}ms")
+        print(f"Windows -> Good: +/-{self.good_window}ms, Perfect: +/-{self.perfect_window}ms")
+
+        # Timeline columns (one entry per step)
+        self.num_steps = 0
+        self.tl_freq = array.array('H')
+        self.tl_freq2 = array.array('H')     # second voice, 0 if none
+        self.tl_target = array.array('l')    # ms from song start
+        self.tl_duration = array.array('l')  # ms
+        self.tl_moves = bytearray()   # remaining required moves, bitmask
+        self.tl_status = bytearray()  # settings.HIT_*
         self._preprocess_song_windows()
         
-        self.start_delay = 2.0  
-        self.start_time = 0.0
+        self.start_delay = 2000  
+        self.start_time = 0
         self.active_index = 0   
-        self.audio_index = 0    
+        self.swept_to = 0       # tilt/tap misses are settled up to this song time
+        self.audio_index = 0    # next note to schedule
+        self.vis_start = 0      # notes drawn on the LEDs: [vis_start, vis_end)
+        self.vis_end = 0
+
+        # Keyframe render path (led_track.py); led_dirty is set when a hit
+        # changes what a note on the strip shows
+        self.led_track = None
+        if led_keyframes:
+            self.led_track = LedTrack(self.tl_target, self.tl_moves, self.num_steps,
+                                      self.look_ahead_time, self.lanes.row_length)
+        self.led_dirty = True
+
+        # Note on/off events, scheduled AUDIO_LOOKAHEAD_MS ahead
+        self.events = TimingWheel(settings.EVENT_SLOT_MS, settings.EVENT_SLOTS,
+                                  settings.EVENT_CAPACITY)
         
-        self.current_buzzer_end_time = 0.0
+        # Last values pushed to the HUD (-1 forces the first draw)
+        self.hud_score = -1
+        self.hud_combo = -1
+
+        # Optional on_judge(move, index, hit_type) callback, for tests/benchmarks
+        self.on_judge = None
+
+        # Input source: the hardware, or a replay.ReplayPlayer in playback.
+        # recorder: optional replay.ReplayRecorder fed every judged input
+        self.input = hardware
+        self.recorder = None
 
-        self.COLOR_NICE_GREEN = settings.COLOR_NICE_GREEN
-        self.COLOR_NICE_RED   = settings.COLOR_NICE_RED
-        self.GRADIENT_BLUE = settings.GRADIENT_BLUE
+        # Phase counters (profiler.py); None unless profiling is on
+        self.profiler = hardware.profiler if hardware else None
 
     def _preprocess_song_windows(self):
-        raw_steps = self.song_data["steps"]
-        total_steps = len(raw_steps)
+        chart = self.song_data
+        total_steps = chart.num_steps
+        tick_len = round(settings.QN * self.bpm_scale * 1000) // chart.ticks_per_qn
         
-        current_play_time = 0.0
+        self.num_steps = total_steps
+        self.tl_moves = bytearray(total_steps)
+        self.tl_status = bytearray(total_steps)
         
-        for note_name, duration, move_input in raw_steps:
-            real_duration = duration * self.bpm_scale
-            freq = self._get_note_freq(note_name)
-            
-            if isinstance(move_input, list):
-                moves_set = set(move_input)
-            else:
-                moves_set = {move_input} if move_input != settings.MOVE_NONE else set()
-
-            target_t = current_play_time
-            win_start_t = target_t - self.good_window
-            win_end_t = target_t + self.good_window
-
-            self.timeline.append({
-                "note": note_name,
-                "freq": freq,
-                "target_time": target_t,
-                "duration": real_duration,
-                "win_start": win_start_t,
-                "win_end": win_end_t,    
-                "required_moves": moves_set,     
-                "total_moves_count": len(moves_set),
-                "hit_status": "NONE"             
-            })
-            current_play_time += real_duration
+        current_play_time = 0
+        i = 0
+        
+        # Stream fixed-size chunks of (note index, ticks, moves) records
+        buf = bytearray(settings.CHART_CHUNK_RECORDS * CHART_RECORD_SIZE)
+        for count in chart.read_chunks(buf):
+            for r in range(0, count * CHART_RECORD_SIZE, CHART_RECORD_SIZE):
+                if i >= total_steps:
+                    break
+                real_duration = buf[r + 1] * tick_len
+
+                freq = NOTE_FREQS[buf[r]]
+                moves = buf[r + 2]
+                self.tl_freq.append(freq)
+                # Steps needing two or more moves sound a fifth above too
+                self.tl_freq2.append(freq * 3 // 2 if moves & (moves - 1) else 0)
+                self.tl_target.append(current_play_time)
+                self.tl_duration.append(real_duration)
+                self.tl_moves[i] = moves
+                
+                current_play_time += real_duration
+                i += 1
             
+        self.num_steps = i
         self.total_duration = current_play_time
 
-    def _get_note_freq(self, note_name):
-        from songs import NOTES
-        return NOTES.get(note_name, 0)
+    @property
+    def score(self):
+        return self.score_fp // settings.SCORE_SCALE
 
     def start(self):
-        self.start_time = time.monotonic() + self.start_delay
+        self.start_time = self.hw.ticks_ms() + self.start_delay
         self.active_index = 0
+        self.swept_to = -self.start_delay
         self.audio_index = 0
-        self.score = 0
+        self.vis_start = 0
+        self.vis_end = 0
+        if self.led_track:
+            self.led_track.reset()
+        self.led_dirty = True
+        self.events.reset(self.hw.ticks_ms())
+        if self.hw.play_song(self._song_notes(), self.start_delay):
+            # The backend plays it all: nothing left to schedule
+            self.audio_index = self.num_steps
+        self.score_fp = 0
         self.combo = 0
         self.max_combo = 0
+        self.hw.frame.reset_stats()
+        self.hw.tones.stop()  # menu sounds never overlap the song
+        if self.profiler:
+            self.profiler.reset()
+        else:
+            # The HUD labels are retained: drop an overlay from a profiled song
+            self.hw.set_hud_text('debug', "")
         self.hw.set_leds((0, 0, 0))
         
         self.hw.display_text("GET READY", scale=2, y_offset=25)
@@ -94,23 +161,130 @@ class RhythmGame:
         if self.is_game_over or self.is_won:
             return
 
-        now = time.monotonic()
+        now = self.hw.ticks_ms()
         song_time = now - self.start_time
 
-        if song_time > self.total_duration + 1.0:
-            self.is_won = True
-            self._stop_tone()
+        if self._check_song_end(song_time):
             return
 
-        self._update_audio(song_time, now)
+        prof = self.profiler
+        if prof:
+            prof.begin(PHASE_AUDIO)
+        self._schedule_audio(now)
+        self.events.fire_due(self.hw.ticks_us(), self._fire_event)
+        if prof:
+            prof.end(PHASE_AUDIO)
+            prof.begin(PHASE_MISSES)
+
+        self._sweep_input_misses()
+        self._update_lane_focus(song_time)
+        if prof:
+            prof.end(PHASE_MISSES)
+            prof.begin(PHASE_VISUALS)
 
-        while self.active_index < len(self.timeline):
-            current_node = self.timeline[self.active_index]
+        self._update_visuals(song_time)
+        if prof:
+            prof.end(PHASE_VISUALS)
+            prof.begin(PHASE_INPUT)
+
+        self._handle_input()
+        if prof:
+            prof.end(PHASE_INPUT)
+
+        # One OLED refresh for everything judged this frame
+        self.hw.refresh_display()
+
+    def register_tasks(self, scheduler):
+        # Same phases as update(), each at its own rate (see settings.SCHED_*)
+        for name, fn, (rate, priority, budget) in (
+            ("events", self.task_events, settings.SCHED_EVENTS),
+            ("input", self.task_input, settings.SCHED_INPUT),
+            ("judge", self.task_judge, settings.SCHED_JUDGE),
+            ("leds", self.task_leds, settings.SCHED_LEDS),
+            ("hud", self.task_hud, settings.SCHED_HUD),
+        ):
+            scheduler.add_task(name, fn, 1000000 // rate, priority, budget)
+
+    def task_events(self):
+        # Only pops what is due; the events were queued by task_judge
+        prof = self.profiler
+        if prof:
+            prof.begin(PHASE_AUDIO)
+        self.events.fire_due(self.hw.ticks_us(), self._fire_event)
+        if prof:
+            prof.end(PHASE_AUDIO)
+
+    def task_input(self):
+        if not (self.is_game_over or self.is_won):
+            prof = self.profiler
+            if prof:
+                prof.begin(PHASE_INPUT)
+            self._handle_input()
+            if prof:
+                prof.end(PHASE_INPUT)
+
+    def task_judge(self):
+        if self.is_game_over or self.is_won:
+            return
+        now = self.hw.ticks_ms()
+        song_time = now - self.start_time
+        if not self._check_song_end(song_time):
+            self._schedule_audio(now)
+            prof = self.profiler
+            if prof:
+                prof.begin(PHASE_MISSES)
+            self._sweep_input_misses()
+            self._update_lane_focus(song_time)
+            if prof:
+                prof.end(PHASE_MISSES)
+
+    def task_leds(self):
+        if not (self.is_game_over or self.is_won):
+            prof = self.profiler
+            if prof:
+                prof.begin(PHASE_VISUALS)
+            self._update_visuals(self.hw.ticks_ms() - self.start_time)
+            if prof:
+                prof.end(PHASE_VISUALS)
+
+    def task_hud(self):
+        if self.profiler:
+            self.hw.set_hud_text('debug', self.profiler.overlay_text())
+        self.hw.refresh_display()
+
+    def _check_song_end(self, song_time):
+        if song_time > self.total_duration + 1000:
+            self.is_won = True
+            self._stop_tone()
+            self.hw.stop_song()
+            frame = self.hw.frame
+            print(f"LED frames pushed: {frame.frames_pushed}, skipped: {frame.frames_skipped}")
+            self.events.print_stats()
+            self.hw.print_input_stats()
+            if self.profiler:
+                self.profiler.print_stats()
+            return True
+        return False
+
+    def _sweep_input_misses(self):
+        inp = self.input
+        self._sweep_misses(inp.input_horizon - self.start_time,
+                           inp.adxl_horizon - self.start_time)
+
+    def _sweep_misses(self, song_time, adxl_time):
+        # Settles the notes whose window closed before song_time, or before
+        # adxl_time for those still needing a tilt or tap
+        if adxl_time > self.swept_to:
+            self.swept_to = adxl_time
+        adxl_moves = settings.ADXL_MOVES
+        while self.active_index < self.num_steps:
+            i = self.active_index
+            horizon = adxl_time if self.tl_moves[i] & adxl_moves else song_time
             
-            if song_time > current_node["win_end"]:
-                if len(current_node["required_moves"]) > 0:
-                    print(f"MISS at index {self.active_index}!")
-                    current_node["hit_status"] = "MISS"
+            if horizon > self.tl_target[i] + self.good_window:
+                if self.tl_moves[i]:
+                    print(f"MISS at index {i}!")
+                    self.tl_status[i] = settings.HIT_MISS
                     self.combo = 0 
                     self._draw_hud("MISS")
                 
@@ -118,146 +292,226 @@ class RhythmGame:
             else:
                 break
 
-        self._update_visuals(song_time)
-
-        self._handle_input(song_time)
-
-    def _update_audio(self, song_time, now_absolute):
-        if now_absolute >= self.current_buzzer_end_time:
-            self._stop_tone()
-
-        while self.audio_index < len(self.timeline):
-            node = self.timeline[self.audio_index]
-            if song_time >= node["target_time"]:
-                if node["freq"] > 0:
-                    play_len = min(node["duration"] * 0.9, 0.5) 
-                    self._start_tone(node["freq"])
-                    self.current_buzzer_end_time = now_absolute + play_len
-                self.audio_index += 1
-            else:
+    def _update_lane_focus(self, song_time):
+        # Moves still needed by notes due within TOUCH_FOCUS_MS (and any
+        # whose window is still open), so their pads are read first
+        horizon = song_time + settings.TOUCH_FOCUS_MS
+        focus = 0
+        i = self.active_index
+        while i < self.num_steps and self.tl_target[i] <= horizon:
+            focus |= self.tl_moves[i]
+            i += 1
+        self.hw.set_lane_focus(focus)
+
+    def _schedule_audio(self, now):
+        # Queues note on/off for every note starting within the lookahead
+        horizon = now - self.start_time + settings.AUDIO_LOOKAHEAD_MS
+        events = self.events
+        while self.audio_index < self.num_steps:
+            i = self.audio_index
+            if self.tl_target[i] > horizon:
                 break
+            freq = self.tl_freq[i]
+            if freq > 0:
+                if events.pending + 2 > events.capacity:
+                    break  # wheel full: retry on the next pass
+                at = self.start_time + self.tl_target[i]
+                events.schedule(at, EV_NOTE_ON, freq | self.tl_freq2[i] << 16)
+                events.schedule(at + self._note_length(i), EV_NOTE_OFF)
+            self.audio_index += 1
+
+    def _song_notes(self):
+        # (start ms, length ms, freq, freq2) of every sounding note
+        for i in range(self.num_steps):
+            freq = self.tl_freq[i]
+            if freq > 0:
+                yield (self.tl_target[i], self._note_length(i), freq, self.tl_freq2[i])
+
+    def _note_length(self, i):
+        # Sounding length: a gap before the next note, capped at 500 ms
+        return min(self.tl_duration[i] * 9 // 10, 500)
+
+    def _fire_event(self, kind, arg):
+        if kind == EV_NOTE_ON:
+            self._start_tone(arg & 0xFFFF, arg >> 16)
+        elif kind == EV_NOTE_OFF:
+            self._stop_tone()
 
-    def _start_tone(self, freq):
-        if self.hw.buzzer:
-            self.hw.buzzer.frequency = freq
-            self.hw.buzzer.duty_cycle = 49152 
+    def _start_tone(self, freq, freq2=0):
+        self.hw.start_tone(freq, freq2)
 
     def _stop_tone(self):
-        if self.hw.buzzer:
-            self.hw.buzzer.duty_cycle = 65535 
+        self.hw.stop_tone()
 
-    def _handle_input(self, song_time):
-        user_input = self.hw.read_game_inputs()
-        
-        if user_input == settings.MOVE_NONE:
+    def _handle_input(self):
+        # Judges every edge of the snapshot (chords) at its own sample time
+        moves = self.input.read_input_snapshot()
+        if not moves:
             return
 
-        if self.active_index < len(self.timeline):
-            active_node = self.timeline[self.active_index]
-            
-            diff = abs(song_time - active_node["target_time"])
+        # Misses are settled first, up to the input horizons: notes still
+        # needing a tilt or tap stay open while one could be in the FIFO.
+        # The replay keeps how far that got (touch notes: up to the input
+        # being processed), so playback judges against the same notes.
+        now = self.hw.ticks_ms()
+        self._sweep_input_misses()
+        swept_to = self.start_time + self.swept_to
+
+        times = self.input.input_times
+        recorder = self.recorder
+        feedback = None
+        move_id = 1
+        while moves >> move_id:
+            if (moves >> move_id) & 1:
+                hit_type = self._judge(move_id, times[move_id] - self.start_time)
+                if hit_type is not None:
+                    if recorder:
+                        recorder.add(now, times[move_id], move_id, swept_to)
+                    if feedback != "GOOD":
+                        feedback = hit_type
+            move_id += 1
+
+        if feedback is not None:
+            self._draw_hud(feedback)
+
+    def _find_note(self, move_bit, song_time):
+        # Closest unsettled note needing move_bit whose window holds
+        # song_time, or -1. Windows are all +/-good_window around sorted
+        # targets, so a bisect finds the first one that can hold it and
+        # only the few notes inside the window are looked at after that.
+        target = self.tl_target
+        lo = self.active_index
+        hi = self.num_steps
+        start = song_time - self.good_window
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if target[mid] < start:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        best = -1
+        best_diff = self.good_window + 1
+        end = song_time + self.good_window
+        while lo < self.num_steps and target[lo] <= end:
+            if self.tl_moves[lo] & move_bit:
+                diff = abs(song_time - target[lo])
+                if diff < best_diff:
+                    best = lo
+                    best_diff = diff
+                elif target[lo] > song_time:
+                    break  # later notes are only further away
+            lo += 1
+        return best
+
+    def _judge(self, user_input, song_time):
+        move_bit = 1 << user_input
+        i = self._find_note(move_bit, song_time)
+        if i < 0:
+            return None
+
+        diff = abs(song_time - self.tl_target[i])
+        moves_left = self.tl_moves[i] ^ move_bit
+        self.tl_moves[i] = moves_left
+        self.led_dirty = True
+        
+        is_perfect = diff <= self.perfect_window
+        
+        base_points = 20 if is_perfect else 10
+        self.score_fp += base_points * self.score_factor
+        
+        if moves_left == 0:
+            self.combo += 1
+            self.max_combo = max(self.max_combo, self.combo)
+            self.tl_status[i] = settings.HIT_HIT
             
-            if diff <= self.good_window:
-                if user_input in active_node["required_moves"]:
-                    active_node["required_moves"].remove(user_input)
-                    
-                    is_perfect = diff <= self.perfect_window
-                    
-                    base_points = 20 if is_perfect else 10
-                    self.score += base_points * self.score_factor
-                    
-                    hit_type = "PERFECT" if is_perfect else "GOOD"
-                    
-                    if len(active_node["required_moves"]) == 0:
-                        self.combo += 1
-                        self.max_combo = max(self.max_combo, self.combo)
-                        active_node["hit_status"] = "HIT"
-                        
-                        if self.combo > 2:
-                            self.score += 5 
-
-                    self._draw_hud(hit_type)
-                    self._flash_row(user_input)
-                else:
-                    pass
+            if self.combo > 2:
+                self.score_fp += 5 * settings.SCORE_SCALE
+
+        self._flash_row(user_input)
+        hit_type = "PERFECT" if is_perfect else "GOOD"
+        if self.on_judge:
+            self.on_judge(user_input, i, hit_type)
+        return hit_type
 
     def _draw_hud(self, feedback_text=""):
-        layers = [
-            {'text': f"Score: {int(self.score)}", 'scale': 1, 'y': 5, 'x': 5}
-        ]
+        score = self.score
+        if score != self.hud_score:
+            self.hud_score = score
+            self.hw.set_hud_text('score', f"Score: {score}")
         
-        if feedback_text:
-            layers.append({'text': feedback_text, 'scale': 2, 'y': 32})
+        self.hw.set_hud_text('feedback', feedback_text)
             
-        if self.combo > 2:
-            layers.append({'text': f"Combo: {self.combo}", 'scale': 1, 'y': 58})
-
-        self.hw.display_layers(layers)
+        combo = self.combo if self.combo > 2 else 0
+        if combo != self.hud_combo:
+            self.hud_combo = combo
+            self.hw.set_hud_text('combo', f"Combo: {combo}" if combo else "")
 
     def _update_visuals(self, song_time):
-        self.hw.pixels.fill((0, 0, 0))
-        
-        start_idx = self.active_index
-        end_idx = min(len(self.timeline), self.active_index + 10)
+        if self.led_track:
+            self._update_visuals_track(song_time)
+            return
 
-        for i in range(start_idx, end_idx):
-            step = self.timeline[i]
-            
-            if step["hit_status"] == "HIT" or len(step["required_moves"]) == 0:
-                continue
-            
-            if step["total_moves_count"] == 0:
+        self.hw.frame.clear()
+
+        # Two pointers over the sorted targets, both only moving forward:
+        # [vis_start, vis_end) are the notes inside the lookahead. Passed
+        # and judged notes leave at the front, new ones enter at the back.
+        target = self.tl_target
+        moves = self.tl_moves
+        start = self.vis_start
+        while start < self.num_steps and (target[start] < song_time or not moves[start]):
+            start += 1
+        self.vis_start = start
+
+        horizon = song_time + self.look_ahead_time
+        end = max(self.vis_end, start)
+        while end < self.num_steps and target[end] <= horizon:
+            end += 1
+        self.vis_end = end
+
+        row_length = self.lanes.row_length
+        for i in range(start, end):
+            moves_left = moves[i]
+            if moves_left == 0:
                 continue
 
-            time_until_hit = step["target_time"] - song_time
-            
-            if 0 <= time_until_hit <= self.look_ahead_time:
-                ratio = 1.0 - (time_until_hit / self.look_ahead_time)
-                local_pos = int(ratio * 7)
-                local_pos = max(0, min(6, local_pos))
-                
-                display_move = list(step["required_moves"])[0]
-                self._draw_note_smart(display_move, local_pos)
-        
-        self.hw.pixels.show()
+            time_until_hit = target[i] - song_time
+            local_pos = row_length * (self.look_ahead_time - time_until_hit) // self.look_ahead_time
+            local_pos = min(row_length - 1, local_pos)
 
-    def _draw_note_smart(self, move_id, local_pos):
-        def get_physical_index(track_idx, vis_pos):
-            if track_idx == 0: return 0 + vis_pos
-            if track_idx == 1: return 13 - vis_pos
-            if track_idx == 2: return 14 + vis_pos
-            if track_idx == 3: return 27 - vis_pos
-            return -1
-
-        pixels_to_light = []
-
-        if move_id in [settings.MOVE_TAP, settings.MOVE_LEFT, settings.MOVE_RIGHT]:
-            for t_idx in range(4):
-                phys_idx = get_physical_index(t_idx, local_pos)
-                if phys_idx < 0: continue
-                
-                color = self.COLOR_NICE_RED 
-                
-                if move_id == settings.MOVE_LEFT:
-                    color = self.GRADIENT_BLUE[t_idx]
-                elif move_id == settings.MOVE_RIGHT:
-                    color = self.GRADIENT_BLUE[3 - t_idx]
-                
-                pixels_to_light.append((phys_idx, color))
+            display_move = _FIRST_MOVE[moves_left]
+            self._draw_note_smart(display_move, local_pos)
+        
+        self.hw.frame.commit()
+
+    def _update_visuals_track(self, song_time):
+        # Same frames as above, but each note's cell comes from the
+        # precomputed keyframes; nothing to redraw unless one came due or
+        # a note was hit since the last frame
+        track = self.led_track
+        if not track.apply(song_time) and not self.led_dirty:
+            return
+        self.led_dirty = False
 
-        elif move_id in [settings.MOVE_TOUCH_1, settings.MOVE_TOUCH_2, settings.MOVE_TOUCH_3, settings.MOVE_TOUCH_4]:
-            target_track = 0
-            if move_id == settings.MOVE_TOUCH_2: target_track = 1
-            if move_id == settings.MOVE_TOUCH_3: target_track = 2
-            if move_id == settings.MOVE_TOUCH_4: target_track = 3
-            
-            phys_idx = get_physical_index(target_track, local_pos)
-            if phys_idx >= 0:
-                pixels_to_light.append((phys_idx, self.COLOR_NICE_GREEN))
+        self.hw.frame.clear()
+        cell = track.cell
+        moves = self.tl_moves
+        for i in range(track.lo, track.hi):
+            pos = cell[i]
+            if pos != OFF and moves[i]:
+                self._draw_note_smart(_FIRST_MOVE[moves[i]], pos)
+        self.hw.frame.commit()
 
-        for p_idx, color_val in pixels_to_light:
-            if 0 <= p_idx < settings.NUM_PIXELS:
-                self.hw.pixels[p_idx] = color_val
+    def _draw_note_smart(self, move_id, local_pos):
+        lanes = self.lanes
+        frame = self.hw.frame
+        base = (move_id * lanes.row_length + local_pos) * lanes.rows
+        for k in range(base, base + lanes.rows):
+            p_idx = lanes.pixel[k]
+            if p_idx == NO_PIXEL:
+                break
+            frame.blit(p_idx, lanes.palette, lanes.color[k])
 
     def _flash_row(self, move_id):
         pass
@@ -4,46 +4,80 @@ import busio
 import displayio
 import terminalio
 import neopixel
-import pwmio
 import touchio
 import digitalio
 import rotaryio  
-import adafruit_adxl34x
 import adafruit_displayio_ssd1306
 from adafruit_display_text import label
+from adafruit_bus_device.i2c_device import I2CDevice
 from i2cdisplaybus import I2CDisplayBus
 import settings
+from led_frame import FrameCompositor
+from hardware_base import HardwareBase
+from audio import make_audio
+from calibration import CalibrationStore
+from touch_scanner import TouchScanner
+from profiler import PHASE_LAYERS
 
-class HardwareManager:
-    def __init__(self):
+# ADXL345 registers
+_ADXL_ADDRESS = 0x53
+_ADXL_REG_THRESH_TAP = 0x1D
+_ADXL_REG_DUR = 0x21
+_ADXL_REG_LATENT = 0x22
+_ADXL_REG_WINDOW = 0x23
+_ADXL_REG_TAP_AXES = 0x2A
+_ADXL_REG_BW_RATE = 0x2C
+_ADXL_REG_INT_ENABLE = 0x2E
+_ADXL_REG_INT_SOURCE = 0x30
+_ADXL_REG_DATAX0 = 0x32
+_ADXL_REG_FIFO_CTL = 0x38
+_ADXL_REG_FIFO_STATUS = 0x39
+_ADXL_FIFO_STREAM = 0x80
+_ADXL_INT_DOUBLE_TAP = 0x20
+_ADXL_RATE_CODES = {25: 0x08, 50: 0x09, 100: 0x0A, 200: 0x0B, 400: 0x0C}
+_ADXL_MS2_PER_LSB = 0.004 * 9.80665
+
+class HardwareManager(HardwareBase):
+    def __init__(self, nvm=None):
+        super().__init__()
+        boot_start = self.ticks_ms()
         print("Initializing Hardware (rotaryio version)...")
-        displayio.release_displays()
+        if nvm is None:
+            import microcontroller
+            nvm = microcontroller.nvm
+        self.calibration = CalibrationStore(nvm)
+        cached = self.calibration.load()
+
         # --- 1. I2C Setup (OLED & ADXL) ---
+        displayio.release_displays()
         self.i2c = busio.I2C(settings.PIN_I2C_SCL, settings.PIN_I2C_SDA)
 
         # --- 2. Display Setup (OLED) ---
-        displayio.release_displays()
         try:
             self.display_bus = I2CDisplayBus(self.i2c, device_address=0x3C)
             self.display = adafruit_displayio_ssd1306.SSD1306(
                 self.display_bus, width=settings.SCREEN_WIDTH, height=settings.SCREEN_HEIGHT
             )
+            self.display.auto_refresh = False
             self.main_group = displayio.Group()
             self.display.root_group = self.main_group
         except Exception as e:
             print(f"OLED Init Error: {e}")
 
+        # In-game HUD: labels are created once and only their text changes
+        self.hud_labels = None
+        self.hud_active = False
+
         # --- 3. Sensor Setup (ADXL345) ---
-        self.accel = adafruit_adxl34x.ADXL345(self.i2c)
-        self.accel.enable_tap_detection(tap_count=1, threshold=20, duration=50, latency=20, window=255)
-        
-        # ADXL Logic Variables
-        self.last_tap_time = 0.0
-        self.cooldown_until = 0.0
-        self.av_x = 0.0
-        
-        # 执行校准 (Calibration)
-        self._calibrate_accelerometer()
+        # The menus don't need it: start_sensors() brings it up before the
+        # first level. av_x comes from the NVM cache when there is one.
+        self.accel = None
+        self.cooldown_until = 0
+        self.av_x = cached[0] if cached else None
+        self.rest_x = 0.0        # running mean of resting X samples, for drift
+        self.rest_samples = 0
+        self.double_tap_difficulty = settings.DIFFICULTY_EASY
+        self.double_tap_pending = False
 
         # --- 4. Inputs: Rotary Encoder & Button ---
         # Encoder Pins: D8, D9
@@ -65,75 +99,218 @@ class HardwareManager:
             settings.MOVE_TOUCH_3: touchio.TouchIn(settings.PIN_TOUCH_3),
             settings.MOVE_TOUCH_4: touchio.TouchIn(settings.PIN_TOUCH_4)
         }
-        # (Edge Detection)
-        self.last_touch_state = {move_id: False for move_id in self.touch_map.keys()}
+        self.touch_list = list(self.touch_map.items())
 
-        for tp in self.touch_map.values():
-           new_threshold = tp.raw_value + 1500
-           tp.threshold = min(new_threshold, 65535)
+        # Baselines saved in NVM; the scanner tracks the live ones
+        if cached:
+            self.touch_baselines = cached[1]
+        else:
+            self.touch_baselines = [self._measure_touch(tp) for tp in self.touch_map.values()]
+        self.touch = TouchScanner(self.touch_list, self.touch_baselines)
+        self.cal_dirty = not cached
+        self.next_cal_check = 0
+        self.cal_pad = 0
 
         # --- 6. Outputs: NeoPixel & Buzzer ---
         # NeoPixel: D4 
         self.pixels = neopixel.NeoPixel(settings.PIN_NEOPIXEL, settings.NUM_PIXELS, brightness=0.3, auto_write=False)
+        self.frame = FrameCompositor(self.pixels, settings.NUM_PIXELS)
+        self.set_profiling(settings.PROFILE)
         
-        # Buzzer: D5 (PWM) - 
-        self.buzzer = pwmio.PWMOut(settings.PIN_BUZZER, duty_cycle=65535, frequency=440, variable_frequency=True)
+        # Buzzer: PWM, or synthio if settings.AUDIO_BACKEND asks for it
+        self.audio = make_audio(settings.PIN_BUZZER)
+        print(f"Hardware ready in {self.ticks_ms() - boot_start}ms "
+              f"({'cached' if cached else 'new'} calibration)")
+
+    def start_sensors(self):
+        # Called before each level: fresh touch scan stats, and the
+        # accelerometer bring-up deferred from boot
+        self.touch.clock = self.ticks_us if self.profiler else None
+        self.touch.reset_stats(self.ticks_ms())
+        if self.accel is not None:
+            return
+        import adafruit_adxl34x
+        self.accel = adafruit_adxl34x.ADXL345(self.i2c)
+        if self.av_x is None:
+            self._calibrate_accelerometer()
+            self.cal_dirty = True
+        self.rest_x = self.av_x
+
+        # FIFO stream mode: samples queue up on the chip between polls
+        self.accel_device = I2CDevice(self.i2c, _ADXL_ADDRESS)
+        self._accel_cmd = bytearray(2)
+        self._accel_status = bytearray(1)
+        self._accel_sample = bytearray(6)
+        self.accel_sample_period = 1000 // settings.ADXL_RATE_HZ
+        self.accel_next_poll = 0
+        self.tilt_time = 0
+        self.last_accel_poll = 0
+        self.double_tap_time = 0
+        self._enable_accel_fifo()
+        self.configure_double_tap(self.double_tap_difficulty)
+        # Tilts and taps now arrive up to one FIFO poll after they happen
+        self.input_latency = settings.ADXL_POLL_INTERVAL
 
     def _calibrate_accelerometer(self):
+        # 20 samples at the chip's default 100 Hz output rate
         print("--- Calibrating ADXL345 ---")
         sum_x = 0.0
         for _ in range(20):
             x, y, z = self.accel.acceleration
             sum_x += x
-            time.sleep(0.05)
+            time.sleep(0.01)
         
         self.av_x = sum_x / 20.0
         print(f"Calibration Complete. Baseline X: {self.av_x:.3f}")
 
-    def read_game_inputs(self):
-        # 1. Touch Pads 
-        detected_touch = settings.MOVE_NONE
-        for move_id, touch_obj in self.touch_map.items():
-            current_state = touch_obj.value
-            if current_state and not self.last_touch_state[move_id]:
-                detected_touch = move_id
-                break 
-            self.last_touch_state[move_id] = current_state
-
-        if detected_touch != settings.MOVE_NONE:
-            return detected_touch
-
-        # 2. Tilt Left/Right
-        current_time_s = time.monotonic()
-        if current_time_s >= self.cooldown_until:
-            x, y, z = self.accel.acceleration
-            x_cal = x - self.av_x 
-            
-            # tilt (+X)
-            if x_cal > settings.ADXL_THRESHOLD:
-                print(f"ACTION: Right Tilt (X={x_cal:.2f})")
-                self.cooldown_until = current_time_s + 1.5
-                return settings.MOVE_LEFT
-            
-            # tilt (-X)
-            elif x_cal < -settings.ADXL_THRESHOLD:
-                print(f"ACTION: Left Tilt (X={x_cal:.2f})")
-                self.cooldown_until = current_time_s + 1.5
-                return settings.MOVE_RIGHT
-            
-        # 3. Double Tap
-        if self.accel.events["tap"]:
-            current_time_ms = time.monotonic() * 1000.0
-            time_diff = current_time_ms - self.last_tap_time
+    def _measure_touch(self, pad):
+        total = 0
+        for _ in range(settings.TOUCH_CAL_SAMPLES):
+            total += pad.raw_value
+        return total // settings.TOUCH_CAL_SAMPLES
+
+    def idle(self):
+        # Background recalibration, one step per CAL_CHECK_INTERVAL while
+        # in the menus: sample one pad (moving its tracked baseline), and
+        # check the resting accelerometer mean gathered during play.
+        # Baselines that drifted from the saved ones are saved again;
+        # otherwise NVM is left alone.
+        now = self.ticks_ms()
+        if now < self.next_cal_check:
+            return
+        self.next_cal_check = now + settings.CAL_CHECK_INTERVAL
+
+        i = self.cal_pad
+        self.cal_pad = (i + 1) % len(self.touch_list)
+        self.touch.sample(i, track=True)
+        tracked = self.touch.baseline[i]
+        if abs(tracked - self.touch_baselines[i]) > settings.TOUCH_DRIFT:
+            print(f"Touch pad {i + 1} drifted: {self.touch_baselines[i]} -> {tracked}")
+            self.touch_baselines[i] = tracked
+            self.cal_dirty = True
+
+        if self.rest_samples >= settings.ADXL_DRIFT_SAMPLES and abs(self.rest_x - self.av_x) > settings.ADXL_DRIFT:
+            print(f"Accelerometer drifted: {self.av_x:.3f} -> {self.rest_x:.3f}")
+            self.av_x = self.rest_x
+            self.cal_dirty = True
+        self.rest_samples = 0
+
+        if self.cal_dirty and self.av_x is not None:
+            self.calibration.save(self.av_x, self.touch_baselines)
+            self.cal_dirty = False
 
-            if 150 < time_diff < 300.0:
+    def _accel_write(self, register, value):
+        self._accel_cmd[0] = register
+        self._accel_cmd[1] = value
+        with self.accel_device as dev:
+            dev.write(self._accel_cmd)
+
+    def _enable_accel_fifo(self):
+        self._accel_write(_ADXL_REG_BW_RATE, _ADXL_RATE_CODES[settings.ADXL_RATE_HZ])
+        self._accel_write(_ADXL_REG_FIFO_CTL, _ADXL_FIFO_STREAM)
+
+    def configure_double_tap(self, difficulty):
+        # Hands double-tap timing to the chip; see settings.ADXL_DOUBLE_TAP
+        self.double_tap_difficulty = difficulty
+        if self.accel is None:
+            return
+        threshold, duration, latency, window = settings.ADXL_DOUBLE_TAP[difficulty]
+        self._accel_write(_ADXL_REG_INT_ENABLE, 0)
+        self._accel_write(_ADXL_REG_TAP_AXES, 0x07)
+        self._accel_write(_ADXL_REG_THRESH_TAP, threshold)
+        self._accel_write(_ADXL_REG_DUR, duration)
+        self._accel_write(_ADXL_REG_LATENT, latency)
+        self._accel_write(_ADXL_REG_WINDOW, window)
+        self._accel_write(_ADXL_REG_INT_ENABLE, _ADXL_INT_DOUBLE_TAP)
+        self.double_tap_pending = False
+
+    def _poll_accel(self, now):
+        # Drains the accelerometer FIFO (at most every ADXL_POLL_INTERVAL)
+        # and checks every sample at its own time for a tilt. The latched
+        # INT_SOURCE register is read in the same bus transaction.
+        if self.accel is None or now < self.accel_next_poll:
+            return settings.MOVE_NONE
+        self.accel_next_poll = now + settings.ADXL_POLL_INTERVAL
+
+        cmd = self._accel_cmd
+        sample = self._accel_sample
+        detected = settings.MOVE_NONE
+        with self.accel_device as dev:
+            cmd[0] = _ADXL_REG_INT_SOURCE
+            dev.write_then_readinto(cmd, self._accel_status, out_end=1)
+            if self._accel_status[0] & _ADXL_INT_DOUBLE_TAP:
+                # The chip latched the double tap somewhere since the last
+                # poll; use the middle of that interval
                 print("ACTION: Double Tap!")
-                self.last_tap_time = 0.0 
-                return settings.MOVE_TAP
-            else:
-                self.last_tap_time = current_time_ms
+                self.double_tap_pending = True
+                self.double_tap_time = (self.last_accel_poll + now) // 2
+            self.last_accel_poll = now
+
+            cmd[0] = _ADXL_REG_FIFO_STATUS
+            dev.write_then_readinto(cmd, self._accel_status, out_end=1)
+            entries = self._accel_status[0] & 0x3F
+
+            # Every read of the data registers pops one FIFO entry
+            cmd[0] = _ADXL_REG_DATAX0
+            for k in range(entries):
+                dev.write_then_readinto(cmd, sample, out_end=1)
+                if detected != settings.MOVE_NONE:
+                    continue
 
-        return settings.MOVE_NONE
+                # Newest sample is "now", older ones one data period apart
+                sample_time = now - (entries - 1 - k) * self.accel_sample_period
+                if sample_time < self.cooldown_until:
+                    continue
+
+                x = sample[0] | (sample[1] << 8)
+                if x & 0x8000:
+                    x -= 0x10000
+                x_ms2 = x * _ADXL_MS2_PER_LSB
+                x_cal = x_ms2 - self.av_x
+
+                # tilt (+X)
+                if x_cal > settings.ADXL_THRESHOLD:
+                    print(f"ACTION: Right Tilt (X={x_cal:.2f})")
+                    detected = settings.MOVE_LEFT
+                
+                # tilt (-X)
+                elif x_cal < -settings.ADXL_THRESHOLD:
+                    print(f"ACTION: Left Tilt (X={x_cal:.2f})")
+                    detected = settings.MOVE_RIGHT
+
+                elif -settings.ADXL_THRESHOLD / 2 < x_cal < settings.ADXL_THRESHOLD / 2:
+                    # Resting: feeds the drift check in idle()
+                    self.rest_x += (x_ms2 - self.rest_x) / 64
+                    self.rest_samples += 1
+
+                if detected != settings.MOVE_NONE:
+                    self.tilt_time = sample_time
+                    self.cooldown_until = sample_time + settings.ADXL_TILT_COOLDOWN
+
+        return detected
+
+    def read_input_snapshot(self):
+        # Every new input edge in one pass, as a bitmask (bit n = move n).
+        # input_times[n] holds when move n was sampled.
+        current_time = self.ticks_ms()
+
+        # 1. Touch Pads (lanes with notes coming up first)
+        moves = self.touch.scan(current_time, self.input_times)
+
+        # 2. Tilt Left/Right (batched from the FIFO)
+        detected_tilt = self._poll_accel(current_time)
+        if detected_tilt != settings.MOVE_NONE:
+            moves |= 1 << detected_tilt
+            self.input_times[detected_tilt] = self.tilt_time
+            
+        # 3. Double Tap (detected by the ADXL345 itself)
+        if self.double_tap_pending:
+            self.double_tap_pending = False
+            moves |= 1 << settings.MOVE_TAP
+            self.input_times[settings.MOVE_TAP] = self.double_tap_time
+
+        self._update_input_horizon(current_time, moves)
+        return moves
 
     def is_button_pressed(self):
         current_state = self.encoder_btn.value  
@@ -142,6 +319,9 @@ class HardwareManager:
         self.last_btn_state = current_state
         return is_pressed_now
 
+    def is_button_down(self):
+        return not self.encoder_btn.value
+
     def get_encoder_delta(self):
 
         current_pos = self.encoder.position
@@ -157,7 +337,17 @@ class HardwareManager:
             
         return 0
 
+    def set_lane_focus(self, moves):
+        self.touch.set_focus(moves)
+
+    def print_input_stats(self):
+        self.touch.print_stats(self.ticks_ms())
+
     def display_layers(self, layers):
+        prof = self.profiler
+        if prof:
+            prof.begin(PHASE_LAYERS)
+        self.hud_active = False
         self.main_group.hidden = True 
         while self.main_group:
             self.main_group.pop()
@@ -183,34 +373,57 @@ class HardwareManager:
             self.main_group.append(text_label)
 
         self.main_group.hidden = False
+        # No frame rate cap: with auto_refresh off, refresh() would skip
+        # (and leave the screen stale) within ~16 ms of the last one
+        self.display.refresh(target_frames_per_second=None)
+        self.last_refresh_time = self.ticks_ms()
+        self.hud_dirty = False
+        if prof:
+            prof.end(PHASE_LAYERS)
 
-    def display_text(self, text, scale=1, x_offset=5, y_offset=None):
-        if y_offset is None:
-            y_offset = settings.SCREEN_HEIGHT // 2
-            
-        self.display_layers([
-            {'text': text, 'scale': scale, 'x': x_offset, 'y': y_offset}
-        ])
+    def _show_hud(self):
+        if self.hud_labels is None:
+            self.hud_labels = {}
+            for name, (scale, x, y) in self.HUD_SLOTS.items():
+                self.hud_labels[name] = label.Label(
+                    terminalio.FONT, text="", scale=scale, color=0xFFFFFF,
+                    x=x if x is not None else settings.SCREEN_WIDTH // 2, y=y
+                )
 
-    def play_tone(self, freq, duration):
-        PLAY_DUTY = 49152   
-        SILENCE_DUTY = 65535 
+        while self.main_group:
+            self.main_group.pop()
+        for text_label in self.hud_labels.values():
+            self.main_group.append(text_label)
 
-        if freq > 0:
-            self.buzzer.frequency = freq
-            self.buzzer.duty_cycle = PLAY_DUTY
-        else:
-            self.buzzer.duty_cycle = SILENCE_DUTY
-            
-        time.sleep(duration)
-        self.buzzer.duty_cycle = SILENCE_DUTY 
-
-    def set_leds(self, color):
-        self.pixels.fill(color)
-        self.pixels.show()
-
-    def set_pixel_segment(self, start, end, color):
-        for i in range(start, end):
-             if 0 <= i < settings.NUM_PIXELS:
-                self.pixels[i] = color
-        self.pixels.show()
+        self.hud_active = True
+        self.hud_dirty = True
+
+    def set_hud_text(self, slot, text):
+        if not self.hud_active:
+            self._show_hud()
+
+        text_label = self.hud_labels[slot]
+        if text_label.text == text:
+            return
+
+        text_label.text = text
+        scale, x, _ = self.HUD_SLOTS[slot]
+        if x is None:
+            text_label.x = (settings.SCREEN_WIDTH - len(text) * 6 * scale) // 2
+        self.hud_dirty = True
+
+    def _refresh(self):
+        # refresh_display() already rate-limits the HUD
+        self.display.refresh(target_frames_per_second=None)
+
+    def start_tone(self, freq, freq2=0):
+        self.audio.start_tone(freq, freq2)
+
+    def stop_tone(self):
+        self.audio.stop_tone()
+
+    def play_song(self, notes, delay_ms):
+        return self.audio.play_song(notes, delay_ms)
+
+    def stop_song(self):
+        self.audio.stop_song()
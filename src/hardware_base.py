@@ -0,0 +1,206 @@
+import time
+import array
+import settings
+from profiler import Profiler, PHASE_HUD
+from tone_sequencer import ToneSequencer
+
+
+class HardwareBase:
+    """
+    Interface RhythmGame and GameApp use to reach the device.
+
+    HardwareManager drives the real board; SimHardwareManager
+    (sim_hardware.py) is a headless stand-in for running on a PC.
+    Subclasses set up `frame` (a FrameCompositor) and implement the
+    methods that raise NotImplementedError.
+    """
+    # HUD slots: name -> (scale, x or None to center, y)
+    HUD_SLOTS = {
+        'score': (1, 5, 5),
+        'feedback': (2, None, 32),
+        'combo': (1, None, 58),
+        'debug': (1, 0, 47),   # profiler overlay, in the gap above combo
+    }
+
+    def __init__(self):
+        self.frame = None
+
+        # read_input_snapshot(): sample time (ticks_ms) of each move's latest
+        # edge. 64-bit: 'l' is 32-bit on CircuitPython, and ticks_ms would
+        # overflow it after ~24.8 days of uptime
+        self.input_times = array.array('q', [0] * (settings.MOVE_TAP + 1))
+        self.pending_moves = 0
+        # Timestamp of the input last returned by read_game_inputs()
+        self.last_input_time = 0
+        # Most ms a tilt or tap (settings.ADXL_MOVES) can reach
+        # read_input_snapshot() after it was sampled. Every touch sampled
+        # before input_horizon (ticks_ms) has been returned, and every tilt
+        # and tap before adxl_horizon: RhythmGame settles misses up to there
+        self.input_latency = 0
+        self.input_horizon = 0
+        self.adxl_horizon = 0
+
+        # HUD refresh rate limiting (see refresh_display)
+        self.hud_dirty = False
+        self.last_refresh_time = 0
+        self.refresh_interval = 1000 // settings.HUD_REFRESH_HZ
+
+        # Phase timing: `profiler` is None while profiling is off
+        self.profiler = None
+        self._profiler = None
+
+        # Menu beeps and jingles, moved along by tones.tick()
+        self.tones = ToneSequencer(self)
+
+    # --- Clock ---
+
+    def ticks_ms(self):
+        # Integer milliseconds; unlike monotonic() this keeps full
+        # resolution however long the device has been up
+        return time.monotonic_ns() // 1000000
+
+    def ticks_us(self):
+        return time.monotonic_ns() // 1000
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def set_profiling(self, enabled):
+        # Call once `frame` exists; counters are allocated on first use
+        if enabled and self._profiler is None:
+            self._profiler = Profiler(self.ticks_us)
+        self.profiler = self._profiler if enabled else None
+        self.frame.profiler = self.profiler
+
+    # --- Inputs ---
+
+    def read_input_snapshot(self):
+        # Every new input edge in one pass, as a bitmask (bit n = move n).
+        # input_times[n] holds when move n was sampled.
+        raise NotImplementedError
+
+    def _update_input_horizon(self, now, moves):
+        # Touches are read as they happen. Tilts and taps: input_latency
+        # behind, or back to the one just returned if older (FIFO drained late)
+        self.input_horizon = now
+        horizon = now - self.input_latency
+        for move_id in (settings.MOVE_RIGHT, settings.MOVE_LEFT, settings.MOVE_TAP):
+            if (moves >> move_id) & 1 and self.input_times[move_id] < horizon:
+                horizon = self.input_times[move_id]
+        self.adxl_horizon = horizon
+
+    def read_game_inputs(self):
+        # One move per call, for the hardware tests
+        if not self.pending_moves:
+            self.pending_moves = self.read_input_snapshot()
+            if not self.pending_moves:
+                return settings.MOVE_NONE
+
+        move_id = 1
+        while not (self.pending_moves >> move_id) & 1:
+            move_id += 1
+        self.pending_moves &= ~(1 << move_id)
+        self.last_input_time = self.input_times[move_id]
+        return move_id
+
+    def configure_double_tap(self, difficulty):
+        raise NotImplementedError
+
+    def start_sensors(self):
+        # Brings up what only gameplay needs (called before each level)
+        pass
+
+    def idle(self):
+        # Background upkeep while in the menus (e.g. recalibration)
+        pass
+
+    def set_lane_focus(self, moves):
+        # Bitmask of the moves with notes coming up, for input scanning
+        pass
+
+    def print_input_stats(self):
+        pass
+
+    def is_button_pressed(self):
+        raise NotImplementedError
+
+    def is_button_down(self):
+        raise NotImplementedError
+
+    def get_encoder_delta(self):
+        raise NotImplementedError
+
+    # --- OLED ---
+
+    def display_layers(self, layers):
+        raise NotImplementedError
+
+    def display_text(self, text, scale=1, x_offset=5, y_offset=None):
+        if y_offset is None:
+            y_offset = settings.SCREEN_HEIGHT // 2
+
+        self.display_layers([
+            {'text': text, 'scale': scale, 'x': x_offset, 'y': y_offset}
+        ])
+
+    def set_hud_text(self, slot, text):
+        raise NotImplementedError
+
+    def refresh_display(self, force=False):
+        # Pushes pending HUD changes to the OLED, at most HUD_REFRESH_HZ
+        if not self.hud_dirty and not force:
+            return False
+
+        now = self.ticks_ms()
+        if not force and now - self.last_refresh_time < self.refresh_interval:
+            return False
+
+        prof = self.profiler
+        if prof:
+            prof.begin(PHASE_HUD)
+        self._refresh()
+        if prof:
+            prof.end(PHASE_HUD)
+        self.last_refresh_time = now
+        self.hud_dirty = False
+        return True
+
+    def _refresh(self):
+        raise NotImplementedError
+
+    # --- Buzzer ---
+
+    def start_tone(self, freq, freq2=0):
+        # freq2: optional second voice, dropped by one-voice backends
+        raise NotImplementedError
+
+    def stop_tone(self):
+        raise NotImplementedError
+
+    def play_song(self, notes, delay_ms):
+        # Background playback of a whole song (see audio.py); False if the
+        # backend can't, and the caller times the notes itself
+        return False
+
+    def stop_song(self):
+        pass
+
+    def play_tone(self, freq, duration):
+        # Blocking, for old callers; GameApp uses tones.play() instead
+        tones = self.tones
+        tones.play((freq, duration), replace=True)
+        wait = tones.tick()
+        while wait is not None:
+            self.sleep(wait / 1000)
+            wait = tones.tick()
+
+    # --- LEDs ---
+
+    def set_leds(self, color):
+        self.frame.fill(color)
+        self.frame.commit()
+
+    def set_pixel_segment(self, start, end, color):
+        for i in range(start, end):
+            self.frame.set_pixel(i, color)
+        self.frame.commit()
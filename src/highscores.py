@@ -0,0 +1,211 @@
+import struct
+import settings
+
+# CRC-8, polynomial 0x07
+_CRC8_TABLE = bytearray(256)
+for _i in range(256):
+    _c = _i
+    for _ in range(8):
+        _c = ((_c << 1) ^ 0x07) & 0xFF if _c & 0x80 else _c << 1
+    _CRC8_TABLE[_i] = _c
+
+def crc8(data, crc=0):
+    for b in data:
+        crc = _CRC8_TABLE[crc ^ b]
+    return crc
+
+
+class ScoreBoard:
+    """
+    One top-scores table in NVM, cached in RAM so reading it never
+    touches flash again.
+
+    The table is stored twice (banks A and B). A bank is a 5-byte header
+    (magic, 16-bit sequence number, CRC-8 of sequence + records) followed
+    by MAX_ENTRIES 8-byte records (3-byte name, uint32 score, CRC-8).
+    Records sit in fixed slots; a new score replaces the lowest one's slot.
+    Saving rewrites the older bank: only the records that differ from it,
+    then its header last, so a power loss mid-save leaves the other bank
+    (the previous table) in charge. Nothing is written until the first
+    add_score(), so untouched boards cost no flash writes.
+    """
+    MAGIC = b'HS'
+    MAX_ENTRIES = settings.NUM_HIGHSCORES
+    HEADER_SIZE = 5
+    RECORD_SIZE = 8
+    BANK_SIZE = HEADER_SIZE + MAX_ENTRIES * RECORD_SIZE
+    BOARD_SIZE = 2 * BANK_SIZE
+
+    # Format before the banks: b'\xBE\xF1' then 7-byte '<3sI' entries
+    LEGACY_HEADER = b'\xBE\xF1'
+    LEGACY_ENTRY_SIZE = 7
+
+    def __init__(self, nvm, offset, default_entry=("---", 0), migrate_legacy=False):
+        self.nvm = nvm
+        self.offset = offset
+        self.migrate_legacy = migrate_legacy
+        self.nvm_writes = 0  # slice writes to flash, for wear accounting
+
+        # RAM copies of both banks as stored, and the table in slot order
+        self.banks = [bytearray(nvm[offset + b * self.BANK_SIZE:offset + (b + 1) * self.BANK_SIZE])
+                      for b in range(2)]
+        self.active = -1
+        self.seq = 0
+        self.slots = [default_entry] * self.MAX_ENTRIES
+        self._load()
+        self._sort()
+
+    # --- Loading ---
+
+    def _bank_seq(self, b):
+        # Sequence number of a bank whose header checks out, else None
+        bank = self.banks[b]
+        magic, seq, crc = struct.unpack_from('<2sHB', bank, 0)
+        if magic != self.MAGIC:
+            return None
+        if crc8(memoryview(bank)[self.HEADER_SIZE:], crc8(bank[2:4])) != crc:
+            return None
+        return seq
+
+    def _load(self):
+        seqs = [self._bank_seq(0), self._bank_seq(1)]
+        if seqs[0] is not None and seqs[1] is not None:
+            # Newer of the two, allowing for the counter wrapping
+            self.active = 1 if (seqs[1] - seqs[0]) & 0xFFFF < 0x8000 else 0
+        elif seqs[0] is not None:
+            self.active = 0
+        elif seqs[1] is not None:
+            self.active = 1
+
+        if self.active >= 0:
+            self.seq = seqs[self.active]
+            bank = self.banks[self.active]
+            for i in range(self.MAX_ENTRIES):
+                o = self.HEADER_SIZE + i * self.RECORD_SIZE
+                record = bank[o:o + self.RECORD_SIZE]
+                if crc8(record[:7]) != record[7]:
+                    print(f"High score slot {i} corrupt")
+                    self.slots[i] = ("ERR", 0)
+                    continue
+                name, score = struct.unpack_from('<3sI', record, 0)
+                self.slots[i] = (name.decode('utf-8').rstrip('\x00'), score)
+            return
+
+        if self.migrate_legacy and self.nvm[self.offset:self.offset + 2] == self.LEGACY_HEADER:
+            print("Migrating old high score table")
+            self._load_legacy()
+
+    def _load_legacy(self):
+        for i in range(self.MAX_ENTRIES):
+            o = self.offset + 2 + i * self.LEGACY_ENTRY_SIZE
+            name, score = struct.unpack('<3sI', self.nvm[o:o + self.LEGACY_ENTRY_SIZE])
+            self.slots[i] = (name.decode('utf-8').rstrip('\x00'), score)
+
+    # --- Table ---
+
+    def _sort(self):
+        # Sorted (name, score, slot) view of the slots
+        table = [(name, score, i) for i, (name, score) in enumerate(self.slots)]
+        table.sort(key=lambda x: x[1], reverse=True)
+        self.table = table
+        self.scores = [(name, score) for name, score, _ in table]
+
+    def get_high_scores(self):
+        return self.scores
+
+    def is_high_score(self, score):
+        return score > self.table[-1][1]
+
+    def add_score(self, name_str, score):
+        # Returns False (and writes nothing) if the score doesn't make the table
+        if not self.is_high_score(score):
+            return False
+        self.slots[self.table[-1][2]] = (name_str, score)
+        self._sort()
+        self._commit()
+        return True
+
+    # --- Saving ---
+
+    def _commit(self):
+        # Bank B first: on a fresh or legacy NVM it doesn't overlap the old table
+        target = 1 - self.active if self.active >= 0 else 1
+        seq = (self.seq + 1) & 0xFFFF
+
+        image = bytearray(self.BANK_SIZE)
+        for i, (name, score) in enumerate(self.slots):
+            o = self.HEADER_SIZE + i * self.RECORD_SIZE
+            struct.pack_into('<3sI', image, o, name.encode('utf-8'), score)
+            image[o + 7] = crc8(image[o:o + 7])
+        struct.pack_into('<2sH', image, 0, self.MAGIC, seq)
+        image[4] = crc8(memoryview(image)[self.HEADER_SIZE:], crc8(image[2:4]))
+
+        # Records first, merging runs of changed ones into a single write
+        old = self.banks[target]
+        base = self.offset + target * self.BANK_SIZE
+        i = 0
+        while i < self.MAX_ENTRIES:
+            o = self.HEADER_SIZE + i * self.RECORD_SIZE
+            if image[o:o + self.RECORD_SIZE] == old[o:o + self.RECORD_SIZE]:
+                i += 1
+                continue
+            end = o + self.RECORD_SIZE
+            i += 1
+            while i < self.MAX_ENTRIES and image[end:end + self.RECORD_SIZE] != old[end:end + self.RECORD_SIZE]:
+                end += self.RECORD_SIZE
+                i += 1
+            self._write(base + o, image[o:end])
+
+        # Header last: only now does this bank become the newest
+        self._write(base, image[:self.HEADER_SIZE])
+
+        self.banks[target] = image
+        self.active = target
+        self.seq = seq
+
+    def _write(self, addr, data):
+        self.nvm[addr:addr + len(data)] = data
+        self.nvm_writes += 1
+
+
+class HighScoreManager:
+    """
+    The overall (session total) board plus one board per (level,
+    difficulty), each at a fixed NVM offset so any of them is read
+    without touching the others. Level boards are loaded on demand and
+    only the last one used stays in RAM.
+    """
+    DEFAULT_ENTRY = ("GIX", 100)
+    NUM_BOARDS = settings.MAX_GAME_LEVELS * len(settings.DIFFICULTY_NAMES)
+
+    def __init__(self, nvm=None):
+        if nvm is None:
+            import microcontroller
+            nvm = microcontroller.nvm
+        self.nvm = nvm
+        self.overall = ScoreBoard(nvm, settings.NVM_HIGHSCORES, self.DEFAULT_ENTRY,
+                                  migrate_legacy=True)
+        self._board = None
+        self._board_key = None
+
+    @staticmethod
+    def board_offset(level, difficulty):
+        index = (level - 1) * len(settings.DIFFICULTY_NAMES) + difficulty
+        return settings.NVM_BOARDS + index * ScoreBoard.BOARD_SIZE
+
+    def board(self, level, difficulty):
+        key = (level, difficulty)
+        if key != self._board_key:
+            self._board = ScoreBoard(self.nvm, self.board_offset(level, difficulty))
+            self._board_key = key
+        return self._board
+
+    # Overall board
+    def get_high_scores(self):
+        return self.overall.get_high_scores()
+
+    def is_high_score(self, score):
+        return self.overall.is_high_score(score)
+
+    def add_score(self, name_str, score):
+        return self.overall.add_score(name_str, score)
@@ -0,0 +1,78 @@
+import settings
+
+NO_PIXEL = 0xFF
+ALL_LANES = 0xFE
+
+def snake_index(track_idx, vis_pos, row_length=settings.LED_ROW_LENGTH, snake=settings.LED_SNAKE):
+    """
+    蛇形走线映射 (snake wiring), e.g. 4 x 7:
+    Track 0 (0-6): 正向, Track 1 (7-13): 反向, Track 2 (14-20): 正向, ...
+    """
+    start = track_idx * row_length
+    if snake and track_idx % 2 == 1:
+        return start + row_length - 1 - vis_pos
+    return start + vis_pos
+
+class LaneMap:
+    """
+    Flat lookup tables for lane rendering, built once per engine.
+    For (move_id, lane position) the entries at
+    (move_id * row_length + pos) * rows ... + rows hold the physical
+    pixel index and its color offset into `palette`, terminated by
+    NO_PIXEL when a move lights fewer than `rows` pixels.
+    """
+    def __init__(self, rows=settings.LED_ROWS, row_length=settings.LED_ROW_LENGTH, snake=settings.LED_SNAKE):
+        self.rows = rows
+        self.row_length = row_length
+        num_moves = settings.MOVE_TAP + 1
+
+        # Move -> lane it is played on (ALL_LANES for tilt / tap)
+        self.move_lane = bytearray(num_moves)
+        for move_id in range(num_moves):
+            self.move_lane[move_id] = NO_PIXEL
+        touch_moves = (settings.MOVE_TOUCH_1, settings.MOVE_TOUCH_2, settings.MOVE_TOUCH_3, settings.MOVE_TOUCH_4)
+        for lane, move_id in enumerate(touch_moves):
+            if lane < rows:
+                self.move_lane[move_id] = lane
+        for move_id in (settings.MOVE_LEFT, settings.MOVE_RIGHT, settings.MOVE_TAP):
+            self.move_lane[move_id] = ALL_LANES
+
+        self.palette = bytearray()
+        self._palette_index = {}
+
+        size = num_moves * row_length * rows
+        self.pixel = bytearray(size)
+        self.color = bytearray(size)
+        for k in range(size):
+            self.pixel[k] = NO_PIXEL
+
+        gradient = settings.GRADIENT_BLUE
+        for move_id in range(num_moves):
+            lane = self.move_lane[move_id]
+            if lane == NO_PIXEL:
+                continue
+
+            for pos in range(row_length):
+                k = (move_id * row_length + pos) * rows
+                for t_idx in range(rows):
+                    if lane != ALL_LANES and lane != t_idx:
+                        continue
+
+                    if move_id == settings.MOVE_LEFT:
+                        color = gradient[t_idx * len(gradient) // rows]
+                    elif move_id == settings.MOVE_RIGHT:
+                        color = gradient[len(gradient) - 1 - t_idx * len(gradient) // rows]
+                    elif move_id == settings.MOVE_TAP:
+                        color = settings.COLOR_NICE_RED
+                    else:
+                        color = settings.COLOR_NICE_GREEN
+
+                    self.pixel[k] = snake_index(t_idx, pos, row_length, snake)
+                    self.color[k] = self._color_offset(color)
+                    k += 1
+
+    def _color_offset(self, color):
+        if color not in self._palette_index:
+            self._palette_index[color] = len(self.palette)
+            self.palette.extend(bytes(color))
+        return self._palette_index[color]
@@ -0,0 +1,73 @@
+from profiler import PHASE_SHOW
+
+class FrameCompositor:
+    """
+    Double-buffered NeoPixel frame. Drawing goes into `back`; commit()
+    only writes the strip when it differs from the last pushed frame.
+    """
+    def __init__(self, pixels, num_pixels):
+        self.pixels = pixels
+        self.num_pixels = num_pixels
+        self.front = bytearray(num_pixels * 3)  # what the strip shows
+        self.back = bytearray(num_pixels * 3)   # frame being built
+        self._blank = bytearray(num_pixels * 3)
+        # The strip may still show a frame from before a soft reload
+        self.force_push = True
+
+        self.frames_pushed = 0
+        self.frames_skipped = 0
+        # Set by HardwareBase.set_profiling(); times pixels.show()
+        self.profiler = None
+
+    def clear(self):
+        self.back[:] = self._blank
+
+    def fill(self, color):
+        r, g, b = color
+        back = self.back
+        for o in range(0, self.num_pixels * 3, 3):
+            back[o] = r
+            back[o + 1] = g
+            back[o + 2] = b
+
+    def set_pixel(self, index, color):
+        if 0 <= index < self.num_pixels:
+            o = index * 3
+            self.back[o] = color[0]
+            self.back[o + 1] = color[1]
+            self.back[o + 2] = color[2]
+
+    def blit(self, index, src, offset):
+        # Copies one RGB triple from src[offset:offset + 3], no tuple needed
+        o = index * 3
+        back = self.back
+        back[o] = src[offset]
+        back[o + 1] = src[offset + 1]
+        back[o + 2] = src[offset + 2]
+
+    def commit(self):
+        back = self.back
+        front = self.front
+        if back == front and not self.force_push:
+            self.frames_skipped += 1
+            return False
+
+        for i in range(self.num_pixels):
+            o = i * 3
+            if self.force_push or back[o] != front[o] or back[o + 1] != front[o + 1] or back[o + 2] != front[o + 2]:
+                self.pixels[i] = (back[o], back[o + 1], back[o + 2])
+        prof = self.profiler
+        if prof:
+            prof.begin(PHASE_SHOW)
+        self.pixels.show()
+        if prof:
+            prof.end(PHASE_SHOW)
+
+        front[:] = back
+        self.force_push = False
+        self.frames_pushed += 1
+        return True
+
+    def reset_stats(self):
+        self.frames_pushed = 0
+        self.frames_skipped = 0
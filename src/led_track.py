@@ -0,0 +1,103 @@
+import array
+
+LEAVE = 0xFF  # keyframe position: the note leaves the strip
+OFF = 0xFF    # cell value: note not on the strip
+
+
+class LedTrack:
+    """
+    Precomputed LED keyframes for one song at one difficulty.
+
+    A note is drawn from target - look_ahead to its target, moving one
+    cell along its lane every look_ahead / row_length ms. Each keyframe
+    is (song ms, note index, new cell) and they are sorted by time, so
+    at runtime apply() only walks the keyframes that came due and
+    updates `cell`. The notes on the strip are always the contiguous
+    index range [lo, hi).
+
+    Uses 7 bytes per keyframe, row_length + 1 keyframes per note.
+    """
+    def __init__(self, tl_target, tl_moves, num_steps, look_ahead, row_length):
+        runs = row_length + 1
+        moving = 0
+        for i in range(num_steps):
+            if tl_moves[i]:
+                moving += 1
+        n = moving * runs
+        self.count = n
+        self.kf_time = array.array('l', [0] * n)
+        self.kf_note = array.array('H', [0] * n)
+        self.kf_pos = bytearray(n)
+
+        # Keyframe time relative to the target, per position. Position p is
+        # entered at the first ms where row_length * (t - enter) // look_ahead
+        # >= p, with enter = target - look_ahead; the last run is LEAVE.
+        offset = [(pos * look_ahead + row_length - 1) // row_length - look_ahead
+                  for pos in range(row_length)]
+        offset.append(1)
+
+        # Targets never decrease, so each position's keyframes are already
+        # in note order: merge those runs by (time, note, pos) straight into
+        # the arrays instead of building and sorting a list of tuples.
+        first = self._next_moving(tl_moves, num_steps, 0)
+        head = [first] * runs
+        head_time = [tl_target[first] + offset[pos] if first < num_steps else 0
+                     for pos in range(runs)]
+        for k in range(n):
+            best = -1
+            for pos in range(runs):
+                i = head[pos]
+                if i >= num_steps:
+                    continue
+                t = head_time[pos]
+                if best < 0 or t < best_time or (t == best_time and i < best_note):
+                    best = pos
+                    best_time = t
+                    best_note = i
+            self.kf_time[k] = best_time
+            self.kf_note[k] = best_note
+            self.kf_pos[k] = best if best < row_length else LEAVE
+            i = self._next_moving(tl_moves, num_steps, best_note + 1)
+            head[best] = i
+            if i < num_steps:
+                head_time[best] = tl_target[i] + offset[best]
+
+        self.cell = bytearray(num_steps)
+        self.reset()
+
+    @staticmethod
+    def _next_moving(tl_moves, num_steps, i):
+        while i < num_steps and not tl_moves[i]:
+            i += 1
+        return i
+
+    def reset(self):
+        for i in range(len(self.cell)):
+            self.cell[i] = OFF
+        self.next = 0
+        self.lo = 0
+        self.hi = 0
+
+    def apply(self, song_time):
+        # Applies the keyframes due by song_time; True if any was
+        next_kf = self.next
+        if next_kf >= self.count or self.kf_time[next_kf] > song_time:
+            return False
+
+        cell = self.cell
+        while next_kf < self.count and self.kf_time[next_kf] <= song_time:
+            i = self.kf_note[next_kf]
+            pos = self.kf_pos[next_kf]
+            cell[i] = pos
+            if pos == 0 and i >= self.hi:
+                self.hi = i + 1
+            next_kf += 1
+        self.next = next_kf
+
+        # Notes leave in index order too
+        while self.lo < self.hi and cell[self.lo] == OFF:
+            self.lo += 1
+        return True
+
+    def size_bytes(self):
+        return self.count * 7 + len(self.cell)
@@ -0,0 +1,26 @@
+# Converts song_library.SONG_LIBRARY into the binary chart files that
+# songs.get_level_data() streams from the CIRCUITPY drive.
+#
+# Usage (on the host, from src/):  python make_charts.py [out_dir]
+# then copy the charts/ folder to the root of CIRCUITPY.
+import os
+import sys
+import songs
+from song_library import SONG_LIBRARY
+
+def convert_library(out_dir=songs.CHART_DIR):
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+
+    for i, song in enumerate(SONG_LIBRARY):
+        for note_name, _, _ in song["steps"]:
+            if note_name not in songs.NOTES:
+                print(f"Level {i+1}: unknown note '{note_name}' stored as REST")
+
+        path = f"{out_dir}/level{i+1:02d}.rmc"
+        with open(path, 'wb') as f:
+            songs.write_chart(f, song["title"], song["steps"])
+        print(f"Level {i+1:2d} {song['title']:<14} {len(song['steps']):3d} steps -> {path}")
+
+if __name__ == "__main__":
+    convert_library(sys.argv[1] if len(sys.argv) > 1 else songs.CHART_DIR)
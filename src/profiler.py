@@ -0,0 +1,70 @@
+import array
+
+# Phases timed in the playing loop (indexes into the counters)
+PHASE_AUDIO = 0     # due note events (RhythmGame.task_events)
+PHASE_MISSES = 1    # RhythmGame._sweep_misses
+PHASE_VISUALS = 2   # RhythmGame._update_visuals (includes PHASE_SHOW)
+PHASE_INPUT = 3     # RhythmGame._handle_input
+PHASE_LAYERS = 4    # HardwareManager.display_layers
+PHASE_SHOW = 5      # pixels.show() in FrameCompositor.commit
+PHASE_HUD = 6       # OLED redraw in HardwareBase.refresh_display
+PHASE_NAMES = ("audio", "miss", "visual", "input", "layers", "show", "hud")
+
+_MASK = 0x3FFFFFFF  # clock kept to 30 bits (small ints on CircuitPython), wraps every ~17.9 min
+_AVG_SHIFT = 4  # rolling average over roughly the last 16 calls
+
+
+class Profiler:
+    """
+    Per-phase tick counters in preallocated arrays. The counters and the
+    masked clock readings stay small ints, so begin()/end() allocate
+    nothing beyond what the clock itself does. On CircuitPython that is
+    not nothing: hw.ticks_us is built from time.monotonic_ns(), a long
+    int, and there is no finer clock that avoids it. Profiling therefore
+    adds a little GC work of its own to the phases it measures.
+
+    Callers keep a `profiler` reference that is None while profiling is
+    off, so a disabled phase costs one `if`.
+    """
+    def __init__(self, clock):
+        self.clock = clock  # ticks in us, e.g. hw.ticks_us
+        n = len(PHASE_NAMES)
+        self.started = array.array('L', [0] * n)
+        self.calls = array.array('L', [0] * n)
+        self.avg = array.array('L', [0] * n)   # rolling average << _AVG_SHIFT
+        self.peak = array.array('L', [0] * n)
+
+    def reset(self):
+        for i in range(len(PHASE_NAMES)):
+            self.calls[i] = 0
+            self.avg[i] = 0
+            self.peak[i] = 0
+
+    def begin(self, phase):
+        self.started[phase] = self.clock() & _MASK
+
+    def end(self, phase):
+        cost = ((self.clock() & _MASK) - self.started[phase]) & _MASK
+        self.calls[phase] += 1
+        self.avg[phase] += cost - (self.avg[phase] >> _AVG_SHIFT)
+        if cost > self.peak[phase]:
+            self.peak[phase] = cost
+
+    def average(self, phase):
+        return self.avg[phase] >> _AVG_SHIFT
+
+    def overlay_text(self):
+        # One OLED line, at most 19 characters: first letter of each phase
+        # + avg in 0.1 ms steps, capped at 99. show is inside visual.
+        return " ".join(f"{PHASE_NAMES[i][0]}{min(self.average(i) // 100, 99)}"
+                        for i in (PHASE_AUDIO, PHASE_MISSES, PHASE_VISUALS,
+                                  PHASE_INPUT, PHASE_HUD))
+
+    def report_lines(self):
+        return [f"{PHASE_NAMES[i]:<6} {self.average(i):4d} {self.peak[i]:5d}"
+                for i in range(len(PHASE_NAMES))]
+
+    def print_stats(self):
+        for i in range(len(PHASE_NAMES)):
+            print(f"{PHASE_NAMES[i]}: calls={self.calls[i]} "
+                  f"avg={self.average(i)}us max={self.peak[i]}us")
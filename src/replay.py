@@ -0,0 +1,210 @@
+import array
+import struct
+import settings
+
+# Input replays: every judged input of a run as 16-bit records.
+#
+#   bits 15..3  delta ms since the previous input was processed
+#   bits  2..0  move id (1..7)
+#
+# move 0 is an escape, its 13-bit argument being:
+#   0..4095     advance the processing time by this many ms (long gaps)
+#   4096..6143  the next input was sampled (arg - 4096) ms before it was
+#               processed (tilt / double tap come in through the ADXL FIFO)
+#   6144..8191  from the next input on, misses of tilt / tap notes were
+#               settled up to (arg - 6144) ms before each input was
+#               processed (see RhythmGame._handle_input); 0 until the first
+#               such record
+#
+# Times count from start_time - REPLAY_LEAD_MS, so inputs judged just
+# before the first note still have a non-negative delta.
+
+REPLAY_MAGIC = b'R2'
+REPLAY_HEADER = '<2sBBHIH'  # magic, level, difficulty, records, score, max combo
+REPLAY_HEADER_SIZE = struct.calcsize(REPLAY_HEADER)
+REPLAY_LEAD_MS = 1000
+
+_DELTA_MAX = 0x1FFF
+_SKIP_MAX = 4095
+_LAG = 4096
+_SWEEP = 6144
+_LAG_MAX = 2047
+
+
+class ReplayRecorder:
+    """
+    Preallocated ring buffer of replay records. If a run outgrows it the
+    oldest records are overwritten and the run is marked `overflowed`
+    (it can no longer be saved or played back).
+    """
+    def __init__(self, capacity=settings.REPLAY_CAPACITY):
+        self.capacity = capacity
+        self.records = array.array('H', [0] * capacity)
+        self.start(0)
+
+    def start(self, start_time, level=0, difficulty=0):
+        self.base = start_time - REPLAY_LEAD_MS
+        self.level = level
+        self.difficulty = difficulty
+        self.score = 0
+        self.max_combo = 0
+        self.head = 0
+        self.count = 0
+        self.overflowed = False
+        self.last_time = self.base
+        self.sweep_lag = 0
+
+    def finish(self, score, max_combo):
+        self.score = score
+        self.max_combo = max_combo
+
+    def _put(self, record):
+        self.records[self.head] = record
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.overflowed = True
+
+    def add(self, processed, sampled, move, swept_to=None):
+        # swept_to: ticks_ms the misses were settled up to when the input
+        # was judged (default: processed)
+        delta = processed - self.last_time
+        if delta < 0:
+            delta = 0
+        self.last_time += delta
+
+        while delta > _DELTA_MAX:
+            self._put(_SKIP_MAX << 3)
+            delta -= _SKIP_MAX
+
+        sweep_lag = 0 if swept_to is None else min(max(processed - swept_to, 0), _LAG_MAX)
+        if sweep_lag != self.sweep_lag:
+            self.sweep_lag = sweep_lag
+            self._put((_SWEEP + sweep_lag) << 3)
+
+        lag = processed - sampled
+        if lag > 0:
+            self._put((_LAG + min(lag, _LAG_MAX)) << 3)
+
+        self._put((delta << 3) | move)
+
+    def record_at(self, i):
+        # i-th record of the run, oldest first
+        return self.records[(self.head - self.count + i) % self.capacity]
+
+    # --- NVM ---
+
+    def save(self, nvm, offset=settings.NVM_REPLAY):
+        if self.overflowed:
+            return False
+        header = struct.pack(REPLAY_HEADER, REPLAY_MAGIC, self.level,
+                             self.difficulty, self.count, self.score, self.max_combo)
+        data = bytearray(self.count * 2)
+        for i in range(self.count):
+            r = self.record_at(i)
+            data[2 * i] = r & 0xFF
+            data[2 * i + 1] = r >> 8
+        # Header last: a replay cut short by a power loss stays invalid
+        end = offset + REPLAY_HEADER_SIZE
+        nvm[offset:offset + 2] = b'\x00\x00'
+        nvm[end:end + len(data)] = data
+        nvm[offset:end] = header
+        return True
+
+    def load(self, nvm, offset=settings.NVM_REPLAY):
+        header = bytes(nvm[offset:offset + REPLAY_HEADER_SIZE])
+        magic, level, difficulty, count, score, max_combo = struct.unpack(REPLAY_HEADER, header)
+        if magic != REPLAY_MAGIC or count > self.capacity:
+            return False
+
+        start = offset + REPLAY_HEADER_SIZE
+        for i in range(count):
+            o = start + 2 * i
+            self.records[i] = nvm[o] | (nvm[o + 1] << 8)
+        self.head = count % self.capacity
+        self.count = count
+        self.overflowed = False
+        self.level = level
+        self.difficulty = difficulty
+        self.score = score
+        self.max_combo = max_combo
+        return True
+
+    def size_bytes(self):
+        return REPLAY_HEADER_SIZE + self.count * 2
+
+
+class ReplayPlayer:
+    """
+    Input source for RhythmGame (read_input_snapshot / input_times and the
+    input / adxl horizons of HardwareBase) that plays a recorder's run
+    back on the hardware clock. Inputs processed together come back
+    together, once the clock reaches the time they were originally
+    processed. The horizons never pass where the misses had been settled
+    when the next input was judged.
+    """
+    def __init__(self, recorder, hw):
+        self.recorder = recorder
+        self.hw = hw
+        self.input_times = array.array('q', [0] * (settings.MOVE_TAP + 1))  # ticks_ms, as HardwareBase
+        self.start(0)
+
+    def start(self, start_time):
+        self.pos = 0
+        self.time = start_time - REPLAY_LEAD_MS
+        self.lag = 0
+        self.sweep_lag = 0
+        self.input_horizon = self.time
+        self.adxl_horizon = self.time
+        self._next()
+
+    def _next(self):
+        # Decodes up to the next input into next_move / next_time /
+        # next_sampled / next_horizon
+        rec = self.recorder
+        self.next_move = settings.MOVE_NONE
+        while self.pos < rec.count:
+            r = rec.record_at(self.pos)
+            self.pos += 1
+            arg = r >> 3
+            move = r & 7
+            if move:
+                self.time += arg
+                self.next_move = move
+                self.next_time = self.time
+                self.next_sampled = self.time - self.lag
+                self.next_horizon = self.time - self.sweep_lag
+                self.lag = 0
+                return
+            if arg >= _SWEEP:
+                self.sweep_lag = arg - _SWEEP
+            elif arg >= _LAG:
+                self.lag = arg - _LAG
+            else:
+                self.time += arg
+
+    def done(self):
+        return self.next_move == settings.MOVE_NONE
+
+    def read_input_snapshot(self):
+        now = self.hw.ticks_ms()
+        moves = 0
+        if self.next_move and self.next_time <= now:
+            processed = self.next_time
+            self.input_horizon = processed
+            self.adxl_horizon = self.next_horizon
+            while self.next_move and self.next_time == processed:
+                bit = 1 << self.next_move
+                if moves & bit:
+                    break
+                moves |= bit
+                self.input_times[self.next_move] = self.next_sampled
+                self._next()
+        elif self.next_move:
+            self.input_horizon = min(now, self.next_time)
+            self.adxl_horizon = min(now, self.next_horizon)
+        else:
+            self.input_horizon = now
+            self.adxl_horizon = now
+        return moves
@@ -0,0 +1,94 @@
+import time
+
+def ticks_us():
+    return time.monotonic_ns() // 1000
+
+class Task:
+    def __init__(self, name, fn, period, priority, budget):
+        self.name = name
+        self.fn = fn
+        self.period = period      # us
+        self.priority = priority  # 0 runs first
+        self.budget = budget      # us
+
+        self.next_due = 0
+        self.last_cost = 0
+        self.max_cost = 0
+        self.runs = 0
+        self.overruns = 0   # runs that took longer than budget
+        self.deferrals = 0  # periods postponed to keep higher priorities on time
+        self.deferred = False
+
+class Scheduler:
+    """
+    Cooperative multi-rate scheduler. Each task runs at most once per
+    period. A due task whose last run would not fit before the next
+    deadline of a higher-priority task is deferred, unless it is already
+    a full period late.
+    """
+    NO_DEADLINE = 1 << 30
+
+    def __init__(self, clock=ticks_us):
+        self.clock = clock
+        self.tasks = []
+
+    def add_task(self, name, fn, period, priority=0, budget=None):
+        task = Task(name, fn, period, priority, period if budget is None else budget)
+        i = 0
+        while i < len(self.tasks) and self.tasks[i].priority <= priority:
+            i += 1
+        self.tasks.insert(i, task)
+        return task
+
+    def start(self):
+        now = self.clock()
+        for task in self.tasks:
+            task.next_due = now
+
+    def run_once(self):
+        now = self.clock()
+        tasks = self.tasks
+        for i in range(len(tasks)):
+            task = tasks[i]
+            if now < task.next_due:
+                continue
+
+            if task.last_cost > self._slack(i, now) and now - task.next_due < task.period:
+                if not task.deferred:
+                    task.deferred = True
+                    task.deferrals += 1
+                continue
+
+            task.fn()
+            end = self.clock()
+            cost = end - now
+
+            task.deferred = False
+            task.runs += 1
+            task.last_cost = cost
+            if cost > task.max_cost:
+                task.max_cost = cost
+            if cost > task.budget:
+                task.overruns += 1
+
+            task.next_due += task.period
+            if task.next_due < end:
+                # Fell behind: drop the missed periods instead of bursting
+                task.next_due = end
+            now = end
+
+    def _slack(self, index, now):
+        # Time left before the earliest deadline of a higher-priority task
+        tasks = self.tasks
+        priority = tasks[index].priority
+        slack = self.NO_DEADLINE
+        for j in range(index):
+            task = tasks[j]
+            if task.priority < priority and task.next_due - now < slack:
+                slack = task.next_due - now
+        return slack
+
+    def print_stats(self):
+        for task in self.tasks:
+            print(f"{task.name}: runs={task.runs} overruns={task.overruns} "
+                  f"deferred={task.deferrals} max={task.max_cost}us")
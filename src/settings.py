@@ -1,16 +1,20 @@
-import board
-
-PIN_TOUCH_1 = board.D0
-PIN_TOUCH_2 = board.D1
-PIN_TOUCH_3 = board.D2
-PIN_TOUCH_4 = board.D3
-PIN_NEOPIXEL = board.D4
-PIN_I2C_SCL = board.D5  
-PIN_I2C_SDA = board.D6
-PIN_BUZZER = board.D7
-PIN_ENCODER_A = board.D8
-PIN_ENCODER_B = board.D9
-PIN_ENCODER_BTN = board.D10
+try:
+    import board
+
+    PIN_TOUCH_1 = board.D0
+    PIN_TOUCH_2 = board.D1
+    PIN_TOUCH_3 = board.D2
+    PIN_TOUCH_4 = board.D3
+    PIN_NEOPIXEL = board.D4
+    PIN_I2C_SCL = board.D5  
+    PIN_I2C_SDA = board.D6
+    PIN_BUZZER = board.D7
+    PIN_ENCODER_A = board.D8
+    PIN_ENCODER_B = board.D9
+    PIN_ENCODER_BTN = board.D10
+except ImportError:
+    # Host-side tools (make_charts.py) import settings without a board
+    pass
 
 DIFFICULTY_EASY = 0
 DIFFICULTY_MED = 1
@@ -19,16 +23,87 @@ DIFFICULTY_NAMES = ["EASY", "NORMAL", "HARD"]
 
 BPM = [2, 1.2, 0.7] 
 DURATION = [0.2, 0.15, 0.1] 
-SCORE_FACTOR = [1, 1.5, 2] 
+# Fixed-point scoring: scores are kept in 1/SCORE_SCALE points
+SCORE_SCALE = 2
+SCORE_FACTOR = [2, 3, 4]  # x1, x1.5, x2 in SCORE_SCALE units
 
 
 MAX_GAME_LEVELS = 10  
 NUM_HIGHSCORES = 6
 
-NUM_PIXELS = 28  
+# LED strip layout: one continuous strip folded into LED_ROWS lanes of
+# LED_ROW_LENGTH pixels; with LED_SNAKE every odd row runs backwards.
+LED_ROWS = 4
+LED_ROW_LENGTH = 7
+LED_SNAKE = True
+NUM_PIXELS = LED_ROWS * LED_ROW_LENGTH
+# Render notes from a keyframe track precomputed per song (led_track.py)
+# instead of working out every note's cell each frame; costs about
+# 7 bytes of RAM per keyframe, LED_ROW_LENGTH + 1 of them per note.
+LED_KEYFRAMES = False
 SCREEN_WIDTH = 128
 SCREEN_HEIGHT = 64
+HUD_REFRESH_HZ = 10  # max in-game OLED refresh rate
+
+INPUT_POLL_INTERVAL = 0.005  # encoder / button sampling in menus (s)
+
+# Per-phase profiling (profiler.py). Off by default; holding the button on
+# a difficulty for DEBUG_HOLD_MS opens the debug screen to switch it on.
+PROFILE = False
+DEBUG_HOLD_MS = 1500
+
+# Playing-loop scheduler: rate (Hz), priority (0 first), budget (us)
+SCHED_EVENTS = (1000, 0, 300)  # fires due note on/off (timing_wheel.py)
+SCHED_INPUT = (1000, 0, 1000)
+SCHED_JUDGE = (500, 1, 1000)   # note scheduling + miss sweep
+SCHED_LEDS = (60, 2, 5000)
+SCHED_HUD = (HUD_REFRESH_HZ, 3, 30000)
+
+# Audio backend (audio.py): "pwm", or "synthio" for background playback
+# through audiopwmio with an envelope and two-voice chords (falls back to
+# PWM if the board lacks it)
+AUDIO_BACKEND = "pwm"
+SYNTH_SAMPLE_RATE = 22050
+SYNTH_ENVELOPE = (0.005, 0.05, 0.04, 1.0, 0.7)  # attack s, decay s, release s, attack level, sustain level
+
+# Timed events: notes are queued AUDIO_LOOKAHEAD_MS ahead on a timing wheel
+# of EVENT_SLOTS x EVENT_SLOT_MS (must cover the lookahead + 500 ms note)
+AUDIO_LOOKAHEAD_MS = 100
+EVENT_SLOT_MS = 8
+EVENT_SLOTS = 128
+EVENT_CAPACITY = 64
 ADXL_THRESHOLD = 6 
+ADXL_RATE_HZ = 100            # output data rate feeding the FIFO
+ADXL_POLL_INTERVAL = 50       # FIFO drain period (ms); 32 samples = 320 ms at 100 Hz
+ADXL_TILT_COOLDOWN = 1500     # ms
+
+# Cached calibration (calibration.py), rechecked in the background from
+# the menus: one touch pad per CAL_CHECK_INTERVAL, plus the resting
+# accelerometer mean gathered during play
+TOUCH_MARGIN = 1500           # touch threshold above the untouched raw value
+TOUCH_CAL_SAMPLES = 8         # raw reads averaged for a fresh baseline
+TOUCH_DRIFT = 400             # raw counts before a saved baseline is replaced
+ADXL_DRIFT = 0.5              # m/s^2 before the X offset is replaced
+ADXL_DRIFT_SAMPLES = 500      # resting samples needed to judge drift (5 s)
+CAL_CHECK_INTERVAL = 500      # ms
+
+# Touch scanning (touch_scanner.py): touched above baseline + TOUCH_MARGIN,
+# released below baseline + TOUCH_RELEASE. Lanes with notes due within
+# TOUCH_FOCUS_MS are read every scan, the rest every TOUCH_IDLE_DIVIDER-th.
+TOUCH_RELEASE = 1000
+TOUCH_BASELINE_MS = 50        # untouched baselines step once per this...
+TOUCH_IIR_SHIFT = 6           # ...by 1/64 of the gap: ~3.2 s time constant
+TOUCH_FOCUS_MS = 400
+TOUCH_IDLE_DIVIDER = 4
+
+# ADXL345 double-tap engine per difficulty, raw register values:
+# (THRESH_TAP 62.5 mg/LSB, DUR 625 us/LSB, LATENT 1.25 ms/LSB, WINDOW 1.25 ms/LSB)
+# The second tap must land LATENT .. LATENT + WINDOW after the first.
+ADXL_DOUBLE_TAP = [
+    (20, 50, 80, 240),   # EASY:   100-400 ms
+    (20, 50, 120, 120),  # NORMAL: 150-300 ms
+    (24, 40, 120, 96),   # HARD:   150-270 ms, firmer tap
+]
 
 MOVE_NONE = 0 
 MOVE_TOUCH_1 = 1
@@ -38,6 +113,23 @@ MOVE_TOUCH_4 = 4
 MOVE_RIGHT = 5
 MOVE_LEFT = 6
 MOVE_TAP = 7
+# Moves read from the accelerometer FIFO, up to ADXL_POLL_INTERVAL late
+ADXL_MOVES = (1 << MOVE_RIGHT) | (1 << MOVE_LEFT) | (1 << MOVE_TAP)
+
+# microcontroller.nvm layout (byte offsets)
+NVM_HIGHSCORES = 0     # overall high score board (2 banks, 106 bytes)
+NVM_BOARDS = 128       # per (level, difficulty) boards, 30 x 106 bytes, up to 3308
+NVM_CALIBRATION = 3328 # cached sensor baselines (calibration.py), 15 bytes
+NVM_REPLAY = 4096      # last saved replay (replay.py)
+NVM_SIZE = 8192        # microcontroller.nvm on the ESP32-C3
+
+# Input replay: ring buffer of 16-bit records (see replay.py)
+REPLAY_CAPACITY = 512
+
+# Timeline hit status (stored per step in a bytearray)
+HIT_NONE = 0
+HIT_HIT = 1
+HIT_MISS = 2
 
 MOVES_LIST = ["TOUCH1","TOUCH2","TOUCH3","TOUCH4","LEFT","RIGHT","DOUBLETAP"]
 
@@ -54,3 +146,7 @@ GRADIENT_BLUE = [
 QN = 0.4
 HN = 0.8
 
+# Binary charts (see songs.py / make_charts.py)
+CHART_TICKS_PER_QN = 4     # EN = 2, QN = 4, HN = 8, WN = 16
+CHART_CHUNK_RECORDS = 16   # records streamed into the engine per read
+
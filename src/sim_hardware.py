@@ -0,0 +1,337 @@
+import math
+import asyncio
+import selectors
+import settings
+from led_frame import FrameCompositor
+from hardware_base import HardwareBase
+from scheduler import Scheduler
+from profiler import PHASE_LAYERS
+
+# Headless backend for running RhythmGame / GameApp on a PC (CPython only).
+# Everything runs on a virtual clock, so songs play as fast as the host can
+# compute them. Inputs are scripted ahead of time; LED frames, OLED text and
+# buzzer changes are recorded with their timestamps.
+
+
+class VirtualClock:
+    def __init__(self, start_ms=0):
+        self.now_ns = start_ms * 1000000
+
+    def monotonic_ns(self):
+        return self.now_ns
+
+    def advance_us(self, us):
+        self.now_ns += us * 1000
+
+    def sleep(self, seconds):
+        self.now_ns += round(seconds * 1e9)
+
+
+class SimPixels:
+    """NeoPixel stand-in; show() records (ticks_ms, frame) when recording."""
+    def __init__(self, clock, num_pixels, record=True):
+        self.clock = clock
+        self.buf = [(0, 0, 0)] * num_pixels
+        self.record = record
+        self.frames = []
+        self.shows = 0
+
+    def __len__(self):
+        return len(self.buf)
+
+    def __getitem__(self, index):
+        return self.buf[index]
+
+    def __setitem__(self, index, color):
+        self.buf[index] = color
+
+    def fill(self, color):
+        self.buf = [tuple(color)] * len(self.buf)
+
+    def show(self):
+        self.shows += 1
+        if self.record:
+            self.frames.append((self.clock.now_ns // 1000000, tuple(self.buf)))
+
+
+class SimHardwareManager(HardwareBase):
+    """
+    HardwareManager with scripted inputs and recorded outputs.
+
+    Tilt and double tap are stamped with their scripted time (subject to
+    ADXL_TILT_COOLDOWN). By default they are also reported right then, as
+    an ideal sensor would; with fifo_delay they only come in at the next
+    poll, every ADXL_POLL_INTERVAL ms, like the real accelerometer FIFO.
+    """
+    def __init__(self, start_ms=0, record_frames=True, fifo_delay=False):
+        super().__init__()
+        self.clock = VirtualClock(start_ms)
+        self.nvm = bytearray(settings.NVM_SIZE)
+
+        # Outputs
+        self.pixels = SimPixels(self.clock, settings.NUM_PIXELS, record_frames)
+        self.frame = FrameCompositor(self.pixels, settings.NUM_PIXELS)
+        self.set_profiling(settings.PROFILE)
+        self.screen = []       # lines currently on the OLED
+        self.screen_log = []   # (ticks_ms, lines) per refresh
+        self.hud_texts = None
+        self.hud_active = False
+        self.tone = 0
+        self.buzzer_log = []   # (ticks_ms, freq), 0 = silence
+        self.double_tap_config = None
+
+        # Scripted inputs: (ticks_ms, seq, kind, arg), kept sorted
+        self.events = []
+        self._seq = 0
+        self.touch_state = bytearray(settings.MOVE_TAP + 1)
+        self.last_touch_state = bytearray(settings.MOVE_TAP + 1)
+        self.tilt_queue = []
+        self.tap_queue = []
+        self.cooldown_until = 0
+        self.fifo_delay = fifo_delay
+        self.accel_next_poll = 0
+        if fifo_delay:
+            self.input_latency = settings.ADXL_POLL_INTERVAL
+        self.encoder_pos = 0
+        self.last_encoder_pos = 0
+        self.button_down = False
+        self.last_btn_state = True
+
+    # --- Clock ---
+
+    def ticks_ms(self):
+        return self.clock.now_ns // 1000000
+
+    def ticks_us(self):
+        return self.clock.now_ns // 1000
+
+    def sleep(self, seconds):
+        self.clock.sleep(seconds)
+
+    # --- Input script ---
+
+    def _add_event(self, at_ms, kind, arg=None):
+        self.events.append((at_ms, self._seq, kind, arg))
+        self._seq += 1
+        self.events.sort()
+
+    def touch(self, move, at_ms, hold_ms=50):
+        self._add_event(at_ms, 'down', move)
+        self._add_event(at_ms + hold_ms, 'up', move)
+
+    def tilt(self, move, at_ms):
+        self._add_event(at_ms, 'tilt', move)
+
+    def double_tap(self, at_ms):
+        self._add_event(at_ms, 'tap')
+
+    def press_move(self, move, at_ms):
+        if move == settings.MOVE_TAP:
+            self.double_tap(at_ms)
+        elif move in (settings.MOVE_LEFT, settings.MOVE_RIGHT):
+            self.tilt(move, at_ms)
+        else:
+            self.touch(move, at_ms)
+
+    def turn(self, steps, at_ms):
+        self._add_event(at_ms, 'turn', steps)
+
+    def click(self, at_ms, hold_ms=50):
+        self._add_event(at_ms, 'button', True)
+        self._add_event(at_ms + hold_ms, 'button', False)
+
+    def autoplay(self, game, offsets=(0,)):
+        # Scripts every required move of a started game, note i pressed
+        # offsets[i % len(offsets)] ms from its target time
+        for i in range(game.num_steps):
+            moves = game.tl_moves[i]
+            at = game.start_time + game.tl_target[i] + offsets[i % len(offsets)]
+            move_id = 1
+            while moves >> move_id:
+                if (moves >> move_id) & 1:
+                    self.press_move(move_id, at)
+                move_id += 1
+
+    def _apply_events(self):
+        now = self.ticks_ms()
+        events = self.events
+        n = 0
+        while n < len(events) and events[n][0] <= now:
+            at, _, kind, arg = events[n]
+            if kind == 'down':
+                self.touch_state[arg] = 1
+            elif kind == 'up':
+                self.touch_state[arg] = 0
+            elif kind == 'tilt':
+                self.tilt_queue.append((at, arg))
+            elif kind == 'tap':
+                self.tap_queue.append(at)
+            elif kind == 'turn':
+                self.encoder_pos += arg
+            elif kind == 'button':
+                self.button_down = arg
+            n += 1
+        if n:
+            del events[:n]
+
+    # --- Inputs ---
+
+    def read_input_snapshot(self):
+        self._apply_events()
+        current_time = self.ticks_ms()
+        moves = 0
+
+        for move_id in range(settings.MOVE_TOUCH_1, settings.MOVE_TOUCH_4 + 1):
+            current_state = self.touch_state[move_id]
+            if current_state and not self.last_touch_state[move_id]:
+                moves |= 1 << move_id
+                self.input_times[move_id] = current_time
+            self.last_touch_state[move_id] = current_state
+
+        if self.fifo_delay:
+            if current_time < self.accel_next_poll:
+                self._update_input_horizon(current_time, moves)
+                return moves
+            self.accel_next_poll = current_time + settings.ADXL_POLL_INTERVAL
+
+        while self.tilt_queue:
+            at, move = self.tilt_queue.pop(0)
+            if at < self.cooldown_until:
+                continue
+            moves |= 1 << move
+            self.input_times[move] = at
+            self.cooldown_until = at + settings.ADXL_TILT_COOLDOWN
+            break
+
+        if self.tap_queue:
+            moves |= 1 << settings.MOVE_TAP
+            self.input_times[settings.MOVE_TAP] = self.tap_queue.pop(0)
+
+        self._update_input_horizon(current_time, moves)
+        return moves
+
+    def configure_double_tap(self, difficulty):
+        self.double_tap_config = settings.ADXL_DOUBLE_TAP[difficulty]
+
+    def is_button_pressed(self):
+        self._apply_events()
+        current_state = not self.button_down
+        is_pressed_now = (not current_state) and self.last_btn_state
+        self.last_btn_state = current_state
+        return is_pressed_now
+
+    def is_button_down(self):
+        self._apply_events()
+        return self.button_down
+
+    def get_encoder_delta(self):
+        self._apply_events()
+        delta = self.encoder_pos - self.last_encoder_pos
+        self.last_encoder_pos = self.encoder_pos
+        return delta
+
+    # --- OLED ---
+
+    def _log_screen(self, lines):
+        self.screen = lines
+        self.screen_log.append((self.ticks_ms(), lines))
+
+    def display_layers(self, layers):
+        prof = self.profiler
+        if prof:
+            prof.begin(PHASE_LAYERS)
+        self.hud_active = False
+        self._log_screen([layer['text'] for layer in layers])
+        self.last_refresh_time = self.ticks_ms()
+        self.hud_dirty = False
+        if prof:
+            prof.end(PHASE_LAYERS)
+
+    def set_hud_text(self, slot, text):
+        if not self.hud_active:
+            # Texts are kept between HUDs, like the device's labels
+            if self.hud_texts is None:
+                self.hud_texts = {name: "" for name in self.HUD_SLOTS}
+            self.hud_active = True
+            self.hud_dirty = True
+
+        if self.hud_texts[slot] == text:
+            return
+        self.hud_texts[slot] = text
+        self.hud_dirty = True
+
+    def _refresh(self):
+        self._log_screen([self.hud_texts[name] for name in self.HUD_SLOTS])
+
+    # --- Buzzer ---
+
+    def start_tone(self, freq, freq2=0):
+        # A one-voice buzzer, like the PWM backend: freq2 is not played
+        if freq <= 0:
+            self.stop_tone()
+        elif freq != self.tone:
+            self.tone = freq
+            self.buzzer_log.append((self.ticks_ms(), freq))
+
+    def stop_tone(self):
+        if self.tone:
+            self.tone = 0
+            self.buzzer_log.append((self.ticks_ms(), 0))
+
+    # --- Running ---
+
+    def run_game(self, game, scheduler=None):
+        # Plays a started RhythmGame to the end on the playing-loop
+        # scheduler, jumping the clock straight to the next due task
+        if scheduler is None:
+            scheduler = Scheduler(clock=self.ticks_us)
+            game.register_tasks(scheduler)
+            scheduler.start()
+        clock = self.clock
+        while not (game.is_game_over or game.is_won):
+            scheduler.run_once()
+            next_due = min(task.next_due for task in scheduler.tasks)
+            clock.now_ns = max(clock.now_ns + 1000, next_due * 1000)
+        return scheduler
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    # Instead of blocking, select() moves the virtual clock on to the
+    # next timer; every loop pass also costs loop_us of virtual time
+    def __init__(self, clock, loop_us):
+        super().__init__()
+        self.clock = clock
+        self.loop_us = loop_us
+
+    def select(self, timeout=None):
+        step = self.loop_us
+        if timeout:
+            step = max(step, math.ceil(timeout * 1000000))
+        self.clock.advance_us(step)
+        return super().select(0)
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock, loop_us=100):
+        super().__init__(_VirtualSelector(clock, loop_us))
+        self.clock = clock
+
+    def time(self):
+        return self.clock.now_ns / 1e9
+
+
+def run_app(app, seconds, loop_us=100):
+    """Runs GameApp.main() for `seconds` of virtual time on app.hw's clock."""
+    loop = VirtualEventLoop(app.hw.clock, loop_us)
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(asyncio.wait_for(app.main(), seconds))
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        asyncio.set_event_loop(None)
+        loop.close()
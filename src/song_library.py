@@ -0,0 +1,194 @@
+import settings
+
+# Source charts for every level. Not loaded on the device: run
+# make_charts.py to turn these into the binary files under charts/.
+
+# --- 1. 基础节拍定义 ---
+QN = settings.QN  # Quarter Note (标准拍)
+HN = settings.HN  # Half Note (两拍)
+EN = QN / 2       # Eighth Note (半拍)
+WN = QN * 4       # Whole Note (全音符/长音)
+
+# 动作缩写 (减少代码量)
+M_NONE = settings.MOVE_NONE
+M_T1 = settings.MOVE_TOUCH_1
+M_T2 = settings.MOVE_TOUCH_2
+M_T3 = settings.MOVE_TOUCH_3
+M_T4 = settings.MOVE_TOUCH_4
+M_L  = settings.MOVE_LEFT
+M_R  = settings.MOVE_RIGHT
+M_TAP = settings.MOVE_TAP
+
+SONG_LIBRARY = [
+    # --- Level 1: Twinkle Twinkle Little Star  ---
+    {
+        "title": "Twinkle Star",
+        "steps": [
+            # Section A: Main Theme
+            ('C4', QN, M_T1), ('C4', QN, M_T1), ('G4', QN, M_T2), ('G4', QN, M_T2),
+            ('A4', QN, M_T3), ('A4', QN, M_T3), ('G4', HN, M_R),
+            ('F4', QN, M_T4), ('F4', QN, M_T4), ('E4', QN, M_T3), ('E4', QN, M_T3),
+            ('D4', QN, M_T2), ('D4', QN, M_T2), ('C4', HN, M_L),
+            
+            # Section B: Bridge 
+            ('G4', QN, M_T2), ('G4', QN, M_T2), ('F4', QN, M_T4), ('F4', QN, M_T4),
+            ('E4', QN, M_T3), ('E4', QN, M_T3), ('D4', HN, M_TAP),
+            ('G4', QN, M_T2), ('G4', QN, M_T2), ('F4', QN, M_T4), ('F4', QN, M_T4),
+            ('E4', QN, M_T3), ('E4', QN, M_T3), ('D4', HN, M_TAP)
+        ]
+    },
+
+    # --- Level 2: Happy Birthday  ---
+    {
+        "title": "Happy B-Day",
+        "steps": [
+            # Line 1
+            ('C4', EN, M_T1), ('C4', EN, M_NONE), ('D4', QN, M_T2), ('C4', QN, M_T1), ('F4', QN, M_T4), ('E4', HN, M_T3),
+            # Line 2
+            ('C4', EN, M_T1), ('C4', EN, M_NONE), ('D4', QN, M_T2), ('C4', QN, M_T1), ('G4', QN, M_R),  ('F4', HN, M_T4),
+            # Line 3 (High part)
+            ('C4', EN, M_T1), ('C4', EN, M_NONE), ('C5', QN, M_TAP),('A4', QN, M_T3), ('F4', QN, M_T4), ('E4', QN, M_T3), ('D4', QN, M_T2),
+            # Line 4 (End)
+            ('Bb4', EN, M_L), ('Bb4', EN, M_NONE),('A4', QN, M_T3), ('F4', QN, M_T4), ('G4', QN, M_R),  ('F4', HN, M_T4),
+        ]
+    },
+
+    # --- Level 3: Jingle Bells (Verse + Chorus) ---
+    {
+        "title": "Jingle Bells",
+        "steps": [            
+            # Chorus: "Jingle Bells..."
+            ('E4', QN, M_T3), ('E4', QN, M_T3), ('E4', HN, M_TAP),
+            ('E4', QN, M_T3), ('E4', QN, M_T3), ('E4', HN, M_TAP),
+            ('E4', QN, M_T3), ('G4', QN, M_R),  ('C4', QN, M_T1), ('D4', QN, M_T2), ('E4', HN, M_T3),
+            
+            # "Oh what fun..."
+            ('F4', QN, M_T4), ('F4', QN, M_T4), ('F4', QN, M_T4), ('F4', EN, M_NONE),
+            ('F4', QN, M_T4), ('E4', QN, M_T3), ('E4', QN, M_T3), ('E4', EN, M_NONE),
+            ('E4', QN, M_T3), ('D4', QN, M_T2), ('D4', QN, M_T2), ('E4', QN, M_T3), ('D4', HN, M_T2), ('G4', HN, M_TAP)
+        ]
+    },
+
+    # --- Level 4: Mario Theme (Main Loop) ---
+    {
+        "title": "Mario Bros",
+        "steps": [            
+            # Main Theme Part A
+            ('C4', QN, M_T1), ('REST', EN, M_NONE), ('G3', EN, M_L), ('REST', EN, M_NONE), ('E3', EN, M_NONE),
+            ('A3', QN, M_T1), ('B3', QN, M_T2), ('Bb3', EN, M_L), ('A3', QN, M_T1),
+            ('G3', EN, M_L), ('E4', QN, M_T3), ('G4', QN, M_R),
+            ('A4', QN, M_T4), ('F4', EN, M_T4), ('G4', EN, M_R),
+            ('REST', EN, M_NONE), ('E4', QN, M_T3), ('C4', EN, M_T1), ('D4', EN, M_T2), ('B3', EN, M_T1),
+            
+            # Repeat ending
+            ('REST', EN, M_NONE), ('C4', HN, M_TAP),
+        ]
+    },
+
+    # --- Level 5: Ode to Joy (A-A-B-A Form) ---
+    {
+        "title": "Ode to Joy",
+        "steps": [
+            # A Section
+            ('E4', QN, M_T3), ('E4', QN, M_T3), ('F4', QN, M_T4), ('G4', QN, M_R),
+            ('G4', QN, M_R),  ('F4', QN, M_T4), ('E4', QN, M_T3), ('D4', QN, M_T2),
+            ('C4', QN, M_T1), ('C4', QN, M_T1), ('D4', QN, M_T2), ('E4', QN, M_T3),
+            ('E4', QN, M_T3), ('D4', EN, M_T2), ('D4', HN, M_T2),
+            
+            # A Section (Variation End)
+            ('E4', QN, M_T3), ('E4', QN, M_T3), ('F4', QN, M_T4), ('G4', QN, M_R),
+            ('G4', QN, M_R),  ('F4', QN, M_T4), ('E4', QN, M_T3), ('D4', QN, M_T2),
+            ('C4', QN, M_T1), ('C4', QN, M_T1), ('D4', QN, M_T2), ('E4', QN, M_T3),
+            ('D4', QN, M_T2), ('C4', EN, M_T1), ('C4', HN, M_TAP),
+        ]
+    },
+
+    # --- Level 6: Imperial March (Extended) ---
+    {
+        "title": "Darth Vader",
+        "steps": [
+            # Main Motif
+            ('G4', QN, M_T2), ('G4', QN, M_T2), ('G4', QN, M_T2),
+            ('Eb4', EN, M_T1), ('Bb4', EN, M_T4), ('G4', QN, M_T2),
+            ('Eb4', EN, M_T1), ('Bb4', EN, M_T4), ('G4', HN, M_TAP),
+            
+            # High Motif
+            ('D5', QN, M_R), ('D5', QN, M_R), ('D5', QN, M_R),
+            ('Eb5', EN, M_T4), ('Bb4', EN, M_T3), ('Gb4', QN, M_T2), # Gb = F#
+            ('Eb4', EN, M_T1), ('Bb4', EN, M_T4), ('G4', HN, M_TAP),
+        ]
+    },
+
+    # --- Level 7: Tetris Theme (A + B Section) ---
+    {
+        "title": "Tetris",
+        "steps": [
+            # Part A
+            ('E4', QN, M_T3), ('B3', EN, M_T1), ('C4', EN, M_T2), ('D4', QN, M_T3), ('C4', EN, M_T2), ('B3', EN, M_T1),
+            ('A3', QN, M_L),  ('A3', EN, M_NONE), ('C4', EN, M_T2), ('E4', QN, M_T3), ('D4', EN, M_T2), ('C4', EN, M_T1),
+            ('B3', QN, M_T1), ('B3', EN, M_NONE), ('C4', EN, M_T2), ('D4', QN, M_T3), ('E4', QN, M_R),
+            ('C4', QN, M_T1), ('A3', QN, M_L), ('A3', QN, M_L),
+        ]
+    },
+
+    # --- Level 8: Zelda's Lullaby (Extended) ---
+    {
+        "title": "Zelda Song",
+        "steps": [
+            ('B3', HN, M_T1), ('D4', QN, M_T2), ('A3', HN, M_L),  ('REST', QN, M_NONE),
+            ('B3', HN, M_T1), ('D4', QN, M_T2), ('A3', HN, M_L),  ('REST', QN, M_NONE),
+            ('B3', HN, M_T1), ('D4', QN, M_T2), ('A4', HN, M_T3), ('G4', QN, M_T2),
+            ('D4', HN, M_T2), ('C4', EN, M_T1), ('B3', EN, M_L),  ('A3', HN, M_L),
+            ('REST', QN, M_NONE),
+            ('B3', HN, M_T1), ('D4', QN, M_T2), ('A4', HN, M_R),  ('G4', QN, M_T2),
+            ('D5', HN, M_TAP),
+        ]
+    },
+
+    # --- Level 9: Mission Impossible (Loop x4) ---
+    {
+        "title": "Impossible",
+        "steps": [
+            # Loop 1
+            ('G4', QN, M_T2), ('G4', QN, M_T2), ('NONE', EN, M_NONE), 
+            ('Bb4', EN, M_T4), ('C5', EN, M_R),
+            ('G4', QN, M_T2), ('G4', QN, M_T2),
+            ('F4', EN, M_T1), ('F#4', EN, M_T2),
+            
+            # Loop 3 (High Note)
+            ('G4', QN, M_T2), ('G4', QN, M_T2), ('NONE', EN, M_NONE),
+            ('Bb4', EN, M_T4), ('C5', EN, M_R),
+            ('G4', QN, M_T2), ('G4', QN, M_T2),
+            ('E4', EN, M_T3), ('Eb4', EN, M_T3), ('D4', HN, M_TAP),
+        ]
+    },
+
+    # --- Level 10: The Final Boss (Endurance Run) ---
+    {
+        "title": "BOSS FIGHT",
+        "steps": [
+            # Phase 1: Ascending Scale
+            ('C4', EN, M_T1), ('D4', EN, M_T2), ('E4', EN, M_T3), ('F4', EN, M_T4),
+            ('G4', EN, M_T1), ('A4', EN, M_T2), ('B4', EN, M_T3), ('C5', EN, M_R),
+            
+            # Phase 2: Descending Scale
+            ('C5', EN, M_R), ('B4', EN, M_L), ('A4', EN, M_R), ('G4', EN, M_L),
+            ('F4', EN, M_T4), ('E4', EN, M_T3), ('D4', EN, M_T2), ('C4', EN, M_T1),
+            
+            # Phase 3: Arpeggios (C Major)
+            ('C4', EN, M_T1), ('E4', EN, M_T3), ('G4', EN, M_R), ('C5', EN, M_TAP),
+            ('G4', EN, M_R), ('E4', EN, M_T3), ('C4', EN, M_T1), ('REST', EN, M_NONE),
+            
+            # Phase 4: Arpeggios (G Major)
+            ('G3', EN, M_L), ('B3', EN, M_T1), ('D4', EN, M_T2), ('G4', EN, M_TAP),
+            ('D4', EN, M_T2), ('B3', EN, M_T1), ('G3', EN, M_L), ('REST', EN, M_NONE),
+
+            # Phase 5: Chaos (Fast Random)
+            ('C4', EN, M_T1), ('C5', EN, M_R), ('G4', EN, M_T2), ('E4', EN, M_T3),
+            ('A4', EN, M_T3), ('F4', EN, M_T4), ('D4', EN, M_T2), ('B3', EN, M_L),
+            
+            # Final Hit
+            ('C4', HN, M_TAP), ('G4', HN, M_TAP), ('C5', WN, M_TAP),
+        ]
+    },
+]
@@ -1,209 +1,94 @@
+import array
+import os
+import struct
 import settings
 
 # --- 1. 音符频率表 (Hz) ---
-NOTES = {
-    'REST': 0,
-    'G3': 196, 'Ab3': 207, 'A3': 220, 'Bb3': 233, 'B3': 247,
-    'C4': 262, 'C#4': 277, 'D4': 294, 'Eb4': 311, 'E4': 330, 'F4': 349, 'F#4': 370, 'G4': 392, 'Ab4': 415, 'A4': 440, 'Bb4': 466, 'B4': 494,
-    'C5': 523, 'C#5': 554, 'D5': 587, 'Eb5': 622, 'E5': 659, 'F5': 698, 'F#5': 740, 'G5': 784,
-}
-
-# --- 2. 基础节拍定义 ---
-QN = settings.QN  # Quarter Note (标准拍)
-HN = settings.HN  # Half Note (两拍)
-EN = QN / 2       # Eighth Note (半拍)
-WN = QN * 4       # Whole Note (全音符/长音)
-
-# 动作缩写 (减少代码量)
-M_NONE = settings.MOVE_NONE
-M_T1 = settings.MOVE_TOUCH_1
-M_T2 = settings.MOVE_TOUCH_2
-M_T3 = settings.MOVE_TOUCH_3
-M_T4 = settings.MOVE_TOUCH_4
-M_L  = settings.MOVE_LEFT
-M_R  = settings.MOVE_RIGHT
-M_TAP = settings.MOVE_TAP
-
-SONG_LIBRARY = [
-    # --- Level 1: Twinkle Twinkle Little Star  ---
-    {
-        "title": "Twinkle Star",
-        "steps": [
-            # Section A: Main Theme
-            ('C4', QN, M_T1), ('C4', QN, M_T1), ('G4', QN, M_T2), ('G4', QN, M_T2),
-            ('A4', QN, M_T3), ('A4', QN, M_T3), ('G4', HN, M_R),
-            ('F4', QN, M_T4), ('F4', QN, M_T4), ('E4', QN, M_T3), ('E4', QN, M_T3),
-            ('D4', QN, M_T2), ('D4', QN, M_T2), ('C4', HN, M_L),
-            
-            # Section B: Bridge 
-            ('G4', QN, M_T2), ('G4', QN, M_T2), ('F4', QN, M_T4), ('F4', QN, M_T4),
-            ('E4', QN, M_T3), ('E4', QN, M_T3), ('D4', HN, M_TAP),
-            ('G4', QN, M_T2), ('G4', QN, M_T2), ('F4', QN, M_T4), ('F4', QN, M_T4),
-            ('E4', QN, M_T3), ('E4', QN, M_T3), ('D4', HN, M_TAP)
-        ]
-    },
-
-    # --- Level 2: Happy Birthday  ---
-    {
-        "title": "Happy B-Day",
-        "steps": [
-            # Line 1
-            ('C4', EN, M_T1), ('C4', EN, M_NONE), ('D4', QN, M_T2), ('C4', QN, M_T1), ('F4', QN, M_T4), ('E4', HN, M_T3),
-            # Line 2
-            ('C4', EN, M_T1), ('C4', EN, M_NONE), ('D4', QN, M_T2), ('C4', QN, M_T1), ('G4', QN, M_R),  ('F4', HN, M_T4),
-            # Line 3 (High part)
-            ('C4', EN, M_T1), ('C4', EN, M_NONE), ('C5', QN, M_TAP),('A4', QN, M_T3), ('F4', QN, M_T4), ('E4', QN, M_T3), ('D4', QN, M_T2),
-            # Line 4 (End)
-            ('Bb4', EN, M_L), ('Bb4', EN, M_NONE),('A4', QN, M_T3), ('F4', QN, M_T4), ('G4', QN, M_R),  ('F4', HN, M_T4),
-        ]
-    },
-
-    # --- Level 3: Jingle Bells (Verse + Chorus) ---
-    {
-        "title": "Jingle Bells",
-        "steps": [            
-            # Chorus: "Jingle Bells..."
-            ('E4', QN, M_T3), ('E4', QN, M_T3), ('E4', HN, M_TAP),
-            ('E4', QN, M_T3), ('E4', QN, M_T3), ('E4', HN, M_TAP),
-            ('E4', QN, M_T3), ('G4', QN, M_R),  ('C4', QN, M_T1), ('D4', QN, M_T2), ('E4', HN, M_T3),
-            
-            # "Oh what fun..."
-            ('F4', QN, M_T4), ('F4', QN, M_T4), ('F4', QN, M_T4), ('F4', EN, M_NONE),
-            ('F4', QN, M_T4), ('E4', QN, M_T3), ('E4', QN, M_T3), ('E4', EN, M_NONE),
-            ('E4', QN, M_T3), ('D4', QN, M_T2), ('D4', QN, M_T2), ('E4', QN, M_T3), ('D4', HN, M_T2), ('G4', HN, M_TAP)
-        ]
-    },
-
-    # --- Level 4: Mario Theme (Main Loop) ---
-    {
-        "title": "Mario Bros",
-        "steps": [            
-            # Main Theme Part A
-            ('C4', QN, M_T1), ('REST', EN, M_NONE), ('G3', EN, M_L), ('REST', EN, M_NONE), ('E3', EN, M_NONE),
-            ('A3', QN, M_T1), ('B3', QN, M_T2), ('Bb3', EN, M_L), ('A3', QN, M_T1),
-            ('G3', EN, M_L), ('E4', QN, M_T3), ('G4', QN, M_R),
-            ('A4', QN, M_T4), ('F4', EN, M_T4), ('G4', EN, M_R),
-            ('REST', EN, M_NONE), ('E4', QN, M_T3), ('C4', EN, M_T1), ('D4', EN, M_T2), ('B3', EN, M_T1),
-            
-            # Repeat ending
-            ('REST', EN, M_NONE), ('C4', HN, M_TAP),
-        ]
-    },
-
-    # --- Level 5: Ode to Joy (A-A-B-A Form) ---
-    {
-        "title": "Ode to Joy",
-        "steps": [
-            # A Section
-            ('E4', QN, M_T3), ('E4', QN, M_T3), ('F4', QN, M_T4), ('G4', QN, M_R),
-            ('G4', QN, M_R),  ('F4', QN, M_T4), ('E4', QN, M_T3), ('D4', QN, M_T2),
-            ('C4', QN, M_T1), ('C4', QN, M_T1), ('D4', QN, M_T2), ('E4', QN, M_T3),
-            ('E4', QN, M_T3), ('D4', EN, M_T2), ('D4', HN, M_T2),
-            
-            # A Section (Variation End)
-            ('E4', QN, M_T3), ('E4', QN, M_T3), ('F4', QN, M_T4), ('G4', QN, M_R),
-            ('G4', QN, M_R),  ('F4', QN, M_T4), ('E4', QN, M_T3), ('D4', QN, M_T2),
-            ('C4', QN, M_T1), ('C4', QN, M_T1), ('D4', QN, M_T2), ('E4', QN, M_T3),
-            ('D4', QN, M_T2), ('C4', EN, M_T1), ('C4', HN, M_TAP),
-        ]
-    },
-
-    # --- Level 6: Imperial March (Extended) ---
-    {
-        "title": "Darth Vader",
-        "steps": [
-            # Main Motif
-            ('G4', QN, M_T2), ('G4', QN, M_T2), ('G4', QN, M_T2),
-            ('Eb4', EN, M_T1), ('Bb4', EN, M_T4), ('G4', QN, M_T2),
-            ('Eb4', EN, M_T1), ('Bb4', EN, M_T4), ('G4', HN, M_TAP),
-            
-            # High Motif
-            ('D5', QN, M_R), ('D5', QN, M_R), ('D5', QN, M_R),
-            ('Eb5', EN, M_T4), ('Bb4', EN, M_T3), ('Gb4', QN, M_T2), # Gb = F#
-            ('Eb4', EN, M_T1), ('Bb4', EN, M_T4), ('G4', HN, M_TAP),
-        ]
-    },
-
-    # --- Level 7: Tetris Theme (A + B Section) ---
-    {
-        "title": "Tetris",
-        "steps": [
-            # Part A
-            ('E4', QN, M_T3), ('B3', EN, M_T1), ('C4', EN, M_T2), ('D4', QN, M_T3), ('C4', EN, M_T2), ('B3', EN, M_T1),
-            ('A3', QN, M_L),  ('A3', EN, M_NONE), ('C4', EN, M_T2), ('E4', QN, M_T3), ('D4', EN, M_T2), ('C4', EN, M_T1),
-            ('B3', QN, M_T1), ('B3', EN, M_NONE), ('C4', EN, M_T2), ('D4', QN, M_T3), ('E4', QN, M_R),
-            ('C4', QN, M_T1), ('A3', QN, M_L), ('A3', QN, M_L),
-        ]
-    },
-
-    # --- Level 8: Zelda's Lullaby (Extended) ---
-    {
-        "title": "Zelda Song",
-        "steps": [
-            ('B3', HN, M_T1), ('D4', QN, M_T2), ('A3', HN, M_L),  ('REST', QN, M_NONE),
-            ('B3', HN, M_T1), ('D4', QN, M_T2), ('A3', HN, M_L),  ('REST', QN, M_NONE),
-            ('B3', HN, M_T1), ('D4', QN, M_T2), ('A4', HN, M_T3), ('G4', QN, M_T2),
-            ('D4', HN, M_T2), ('C4', EN, M_T1), ('B3', EN, M_L),  ('A3', HN, M_L),
-            ('REST', QN, M_NONE),
-            ('B3', HN, M_T1), ('D4', QN, M_T2), ('A4', HN, M_R),  ('G4', QN, M_T2),
-            ('D5', HN, M_TAP),
-        ]
-    },
-
-    # --- Level 9: Mission Impossible (Loop x4) ---
-    {
-        "title": "Impossible",
-        "steps": [
-            # Loop 1
-            ('G4', QN, M_T2), ('G4', QN, M_T2), ('NONE', EN, M_NONE), 
-            ('Bb4', EN, M_T4), ('C5', EN, M_R),
-            ('G4', QN, M_T2), ('G4', QN, M_T2),
-            ('F4', EN, M_T1), ('F#4', EN, M_T2),
-            
-            # Loop 3 (High Note)
-            ('G4', QN, M_T2), ('G4', QN, M_T2), ('NONE', EN, M_NONE),
-            ('Bb4', EN, M_T4), ('C5', EN, M_R),
-            ('G4', QN, M_T2), ('G4', QN, M_T2),
-            ('E4', EN, M_T3), ('Eb4', EN, M_T3), ('D4', HN, M_TAP),
-        ]
-    },
-
-    # --- Level 10: The Final Boss (Endurance Run) ---
-    {
-        "title": "BOSS FIGHT",
-        "steps": [
-            # Phase 1: Ascending Scale
-            ('C4', EN, M_T1), ('D4', EN, M_T2), ('E4', EN, M_T3), ('F4', EN, M_T4),
-            ('G4', EN, M_T1), ('A4', EN, M_T2), ('B4', EN, M_T3), ('C5', EN, M_R),
-            
-            # Phase 2: Descending Scale
-            ('C5', EN, M_R), ('B4', EN, M_L), ('A4', EN, M_R), ('G4', EN, M_L),
-            ('F4', EN, M_T4), ('E4', EN, M_T3), ('D4', EN, M_T2), ('C4', EN, M_T1),
-            
-            # Phase 3: Arpeggios (C Major)
-            ('C4', EN, M_T1), ('E4', EN, M_T3), ('G4', EN, M_R), ('C5', EN, M_TAP),
-            ('G4', EN, M_R), ('E4', EN, M_T3), ('C4', EN, M_T1), ('REST', EN, M_NONE),
-            
-            # Phase 4: Arpeggios (G Major)
-            ('G3', EN, M_L), ('B3', EN, M_T1), ('D4', EN, M_T2), ('G4', EN, M_TAP),
-            ('D4', EN, M_T2), ('B3', EN, M_T1), ('G3', EN, M_L), ('REST', EN, M_NONE),
-
-            # Phase 5: Chaos (Fast Random)
-            ('C4', EN, M_T1), ('C5', EN, M_R), ('G4', EN, M_T2), ('E4', EN, M_T3),
-            ('A4', EN, M_T3), ('F4', EN, M_T4), ('D4', EN, M_T2), ('B3', EN, M_L),
-            
-            # Final Hit
-            ('C4', HN, M_TAP), ('G4', HN, M_TAP), ('C5', WN, M_TAP),
-        ]
-    },
-]
+# Charts store a note as its index in this table, so only append to it.
+NOTE_TABLE = (
+    ('REST', 0),
+    ('G3', 196), ('Ab3', 207), ('A3', 220), ('Bb3', 233), ('B3', 247),
+    ('C4', 262), ('C#4', 277), ('D4', 294), ('Eb4', 311), ('E4', 330), ('F4', 349), ('F#4', 370), ('G4', 392), ('Ab4', 415), ('A4', 440), ('Bb4', 466), ('B4', 494),
+    ('C5', 523), ('C#5', 554), ('D5', 587), ('Eb5', 622), ('E5', 659), ('F5', 698), ('F#5', 740), ('G5', 784),
+)
+NOTES = {name: freq for name, freq in NOTE_TABLE}
+NOTE_FREQS = array.array('H', [freq for _, freq in NOTE_TABLE])
+
+# --- 2. 二进制谱面格式 (Binary chart format) ---
+# Header: magic, version, ticks per quarter note, step count, title
+# Record: note index, duration in ticks, required-moves bitmask (bit n = move n)
+CHART_MAGIC = b'RMC1'
+CHART_VERSION = 1
+CHART_HEADER = '<4sBBH16s'
+CHART_HEADER_SIZE = struct.calcsize(CHART_HEADER)
+CHART_RECORD_SIZE = 3
+
+CHART_DIR = __file__.rsplit('/', 1)[0] + '/charts' if '/' in __file__ else 'charts'
+
+class Chart:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(CHART_HEADER_SIZE)
+        if len(header) != CHART_HEADER_SIZE:
+            raise ValueError(f"Truncated chart: {path}")
+
+        magic, version, self.ticks_per_qn, self.num_steps, title = struct.unpack(CHART_HEADER, header)
+        if magic != CHART_MAGIC or version != CHART_VERSION:
+            raise ValueError(f"Bad chart header: {path}")
+        self.title = title.rstrip(b'\x00').decode('utf-8')
+
+    def read_chunks(self, buf):
+        # Fills buf with whole records and yields how many were read
+        with open(self.path, 'rb') as f:
+            f.seek(CHART_HEADER_SIZE)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                yield n // CHART_RECORD_SIZE
+
+def write_chart(f, title, steps):
+    f.write(struct.pack(CHART_HEADER, CHART_MAGIC, CHART_VERSION, settings.CHART_TICKS_PER_QN,
+                        len(steps), title.encode('utf-8')))
+    names = [name for name, _ in NOTE_TABLE]
+    tick_len = settings.QN / settings.CHART_TICKS_PER_QN
+
+    for note_name, duration, move_input in steps:
+        note_index = names.index(note_name) if note_name in names else 0
+
+        ticks = round(duration / tick_len)
+        if ticks < 1 or ticks > 255 or abs(ticks * tick_len - duration) > 1e-6:
+            raise ValueError(f"Duration {duration} is not a whole number of ticks")
+
+        moves = move_input if isinstance(move_input, list) else [move_input]
+        moves_mask = 0
+        for m in moves:
+            if m != settings.MOVE_NONE:
+                moves_mask |= 1 << m
+
+        f.write(bytes((note_index, ticks, moves_mask)))
+
+def level_filename(level_number):
+    return f"{CHART_DIR}/level{level_number:02d}.rmc"
+
+def level_count():
+    try:
+        names = os.listdir(CHART_DIR)
+    except OSError:
+        return 0
+    return len([n for n in names if n.startswith('level') and n.endswith('.rmc')])
 
 def get_level_data(level_index):
-    total_songs = len(SONG_LIBRARY)
+    total_songs = level_count()
     if total_songs == 0:
         return None
     safe_index = (level_index - 1) % total_songs 
-    return SONG_LIBRARY[safe_index]
+    try:
+        return Chart(level_filename(safe_index + 1))
+    except (OSError, ValueError) as e:
+        print(f"Chart load error: {e}")
+        return None
 
 def get_frequency(note_name):
-    return NOTES.get(note_name, 0)
\ No newline at end of file
+    return NOTES.get(note_name, 0)
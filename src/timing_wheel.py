@@ -0,0 +1,142 @@
+import array
+
+# Timed events of the playing loop. Kinds index the per-kind stats.
+EV_NOTE_ON = 0    # arg: freq | freq2 << 16 (Hz, freq2 0 = one voice)
+EV_NOTE_OFF = 1
+EVENT_NAMES = ("note_on", "note_off")
+
+_NONE = -1
+_LOG_SIZE = 256   # lateness of the most recent events, in us
+
+
+class TimingWheel:
+    """
+    Time-ordered queue of future events (absolute ticks_ms) on a single
+    hashed timing wheel: num_slots buckets of slot_ms each, so an event
+    can be up to num_slots * slot_ms ms ahead of the wheel position.
+    Internally times count from the reset(now) origin: the 32-bit pool
+    columns then can't overflow however long the board has been up.
+
+    Events live in a preallocated pool, chained per bucket in due order;
+    schedule() and fire_due() do not allocate. Each fired event logs how
+    late it ran (us) in `late_log` and the per-kind stats.
+    """
+    def __init__(self, slot_ms, num_slots, capacity):
+        self.slot_ms = slot_ms
+        self.num_slots = num_slots
+        self.horizon = slot_ms * num_slots
+        self.capacity = capacity
+
+        # Event pool: parallel columns, `link` chains a bucket or the free list
+        self.due = array.array('l', [0] * capacity)
+        self.kind = bytearray(capacity)
+        self.arg = array.array('l', [0] * capacity)
+        self.link = array.array('h', [_NONE] * capacity)
+        self.heads = array.array('h', [_NONE] * num_slots)
+
+        n = len(EVENT_NAMES)
+        self.fired = array.array('L', [0] * n)
+        self.late_sum = array.array('L', [0] * n)
+        self.late_max = array.array('L', [0] * n)
+        self.late_log = array.array('l', [0] * _LOG_SIZE)
+        self.reset(0)
+
+    def reset(self, now):
+        for s in range(self.num_slots):
+            self.heads[s] = _NONE
+        for i in range(self.capacity - 1):
+            self.link[i] = i + 1
+        self.link[self.capacity - 1] = _NONE
+        self.free = 0
+        self.pending = 0
+        self.dropped = 0
+        self.origin = now
+        self.cursor = 0   # next bucket to fire, in slot units from origin
+        for k in range(len(EVENT_NAMES)):
+            self.fired[k] = 0
+            self.late_sum[k] = 0
+            self.late_max[k] = 0
+        self.log_count = 0
+
+    def schedule(self, due, kind, arg=0):
+        # False (and counted in `dropped`) if the pool is full or `due` is
+        # beyond the horizon. Overdue events go in the current bucket.
+        due -= self.origin
+        slot = due // self.slot_ms
+        if slot - self.cursor >= self.num_slots or self.free == _NONE:
+            self.dropped += 1
+            return False
+        if slot < self.cursor:
+            slot = self.cursor
+
+        e = self.free
+        self.free = self.link[e]
+        self.due[e] = due
+        self.kind[e] = kind
+        self.arg[e] = arg
+
+        # Insert after every event due at or before it: equal times fire
+        # in the order they were scheduled
+        b = slot % self.num_slots
+        prev = _NONE
+        cur = self.heads[b]
+        while cur != _NONE and self.due[cur] <= due:
+            prev = cur
+            cur = self.link[cur]
+        self.link[e] = cur
+        if prev == _NONE:
+            self.heads[b] = e
+        else:
+            self.link[prev] = e
+        self.pending += 1
+        return True
+
+    def fire_due(self, now_us, dispatch):
+        # Calls dispatch(kind, arg) for every event due by now_us, in time
+        # order, then moves the wheel up to the current bucket
+        now_us -= self.origin * 1000
+        if not self.pending:
+            self.cursor = now_us // 1000 // self.slot_ms
+            return
+        now = now_us // 1000
+        target = now // self.slot_ms
+        if target - self.cursor >= self.num_slots:
+            # Stalled for a whole turn: every bucket is due once
+            self.cursor = target - self.num_slots + 1
+
+        slot = self.cursor
+        while slot <= target and self.pending:
+            b = slot % self.num_slots
+            e = self.heads[b]
+            while e != _NONE and self.due[e] <= now:
+                nxt = self.link[e]
+                self.heads[b] = nxt
+                self.link[e] = self.free
+                self.free = e
+                self.pending -= 1
+                self._log(self.kind[e], now_us - self.due[e] * 1000)
+                dispatch(self.kind[e], self.arg[e])
+                e = nxt
+            slot += 1
+        self.cursor = target
+
+    def _log(self, kind, late):
+        self.late_log[self.log_count % _LOG_SIZE] = late
+        self.log_count += 1
+        self.fired[kind] += 1
+        self.late_sum[kind] += late
+        if late > self.late_max[kind]:
+            self.late_max[kind] = late
+
+    def recent_lateness(self):
+        # Lateness (us) of the last fired events, oldest first
+        n = min(self.log_count, _LOG_SIZE)
+        return [self.late_log[(self.log_count - n + i) % _LOG_SIZE] for i in range(n)]
+
+    def print_stats(self):
+        for k in range(len(EVENT_NAMES)):
+            n = self.fired[k]
+            avg = self.late_sum[k] // n if n else 0
+            print(f"{EVENT_NAMES[k]}: fired={n} late avg={avg}us max={self.late_max[k]}us")
+        if self.dropped:
+            print(f"events dropped: {self.dropped}")
@@ -0,0 +1,49 @@
+class ToneSequencer:
+    """
+    Queue of (freq, seconds) tones moved along by tick(), so beeps and
+    jingles play while the caller keeps polling input. freq 0 is a rest.
+
+    Menus tick it from GameApp's input loop; HardwareBase.play_tone() is a
+    blocking wrapper around it for old callers.
+    """
+    def __init__(self, hw):
+        self.hw = hw
+        self.queue = []
+        self.active = False   # a tone or rest from the queue is under way
+        self.end_time = 0     # ticks_ms when it ends
+
+    def play(self, *tones, replace=False):
+        if replace:
+            # Cut the current tone and anything still queued
+            self.queue.clear()
+            self.end_time = self.hw.ticks_ms()
+        self.queue.extend(tones)
+        self.tick()
+
+    def stop(self):
+        self.queue.clear()
+        if self.active:
+            self.active = False
+            self.hw.stop_tone()
+
+    def tick(self):
+        # Returns ms until the next change, or None once the queue is done
+        now = self.hw.ticks_ms()
+        if self.active and now < self.end_time:
+            return self.end_time - now
+
+        if not self.queue:
+            if self.active:
+                self.active = False
+                self.hw.stop_tone()
+            return None
+
+        freq, duration = self.queue.pop(0)
+        if freq > 0:
+            self.hw.start_tone(freq)
+        else:
+            self.hw.stop_tone()
+        ms = round(duration * 1000)
+        self.active = True
+        self.end_time = now + ms
+        return ms
@@ -0,0 +1,123 @@
+import array
+import settings
+
+
+class TouchScanner:
+    """
+    Reads the capacitive pads through raw_value with our own thresholds:
+
+    - an integer moving average tracks each untouched pad's baseline
+      (base += (raw - base) >> TOUCH_IIR_SHIFT), frozen while touched.
+      It steps once per TOUCH_BASELINE_MS on the pad's next read, however
+      often the pad is read, so a finger landing over a few ms can't
+      drag the baseline along with it
+    - hysteresis: a pad is touched once raw rises TOUCH_MARGIN above its
+      baseline, and released when it falls back under TOUCH_RELEASE
+
+    Pads whose lanes have notes coming up (set_focus) are read first and
+    on every scan; the others, unless held, every TOUCH_IDLE_DIVIDER-th
+    scan. Reads per pad are always counted; read cost (us) is timed only
+    while `clock` is set, e.g. to hw.ticks_us when profiling.
+    """
+    def __init__(self, pads, baselines):
+        self.pads = pads    # [(move_id, touchio.TouchIn)]
+        n = len(pads)
+        self.baseline = array.array('l', baselines)
+        self.touched = bytearray(n)
+        self.track_due = bytearray(n)   # baseline step owed on the next read
+        self.last_track = 0
+        self.focus = 0
+        self.order = bytearray(range(n))
+        self.scans = 0
+        self.clock = None
+
+        self.samples = array.array('L', [0] * n)
+        self.cost = array.array('L', [0] * n)
+        self.peak = array.array('L', [0] * n)
+        self.stats_since = 0
+
+    def set_focus(self, moves):
+        # moves: bitmask of the lanes with notes coming up
+        if moves == self.focus:
+            return
+        self.focus = moves
+        i = 0
+        for want in (1, 0):
+            for p in range(len(self.pads)):
+                if ((moves >> self.pads[p][0]) & 1) == want:
+                    self.order[i] = p
+                    i += 1
+
+    def sample(self, p, track=False):
+        # Reads pad p; True on a new touch. track: step the baseline
+        # toward this read if the pad is untouched
+        pad = self.pads[p][1]
+        clock = self.clock
+        if clock:
+            t0 = clock()
+            raw = pad.raw_value
+            cost = clock() - t0
+            self.cost[p] += cost
+            if cost > self.peak[p]:
+                self.peak[p] = cost
+        else:
+            raw = pad.raw_value
+        self.samples[p] += 1
+
+        delta = raw - self.baseline[p]
+        if self.touched[p]:
+            if delta < settings.TOUCH_RELEASE:
+                self.touched[p] = 0
+            return False
+        if delta > settings.TOUCH_MARGIN:
+            self.touched[p] = 1
+            return True
+        if track:
+            self.baseline[p] += delta >> settings.TOUCH_IIR_SHIFT
+        return False
+
+    def scan(self, now, times):
+        # Bitmask of new touches; times[move] = now for each of them
+        self.scans += 1
+        full = self.scans % settings.TOUCH_IDLE_DIVIDER == 0
+        due = self.track_due
+        if now - self.last_track >= settings.TOUCH_BASELINE_MS:
+            self.last_track = now
+            for p in range(len(due)):
+                due[p] = 1
+        focus = self.focus
+        edges = 0
+        for p in self.order:
+            move_id = self.pads[p][0]
+            if not (full or (focus >> move_id) & 1 or self.touched[p]):
+                continue
+            track = due[p]
+            due[p] = 0
+            if self.sample(p, track):
+                edges |= 1 << move_id
+                times[move_id] = now
+        return edges
+
+    # --- Stats ---
+
+    def reset_stats(self, now):
+        for p in range(len(self.pads)):
+            self.samples[p] = 0
+            self.cost[p] = 0
+            self.peak[p] = 0
+        self.stats_since = now
+
+    def report_lines(self, now):
+        # Per pad: reads per second, then average and worst read cost (us)
+        elapsed = max(now - self.stats_since, 1)
+        lines = []
+        for p in range(len(self.pads)):
+            n = self.samples[p]
+            avg = self.cost[p] // n if n else 0
+            lines.append(f"pad{self.pads[p][0]} {n * 1000 // elapsed:4d}/s "
+                         f"{avg:4d}us {self.peak[p]:5d}us")
+        return lines
+
+    def print_stats(self, now):
+        for line in self.report_lines(now):
+            print(line)
@@ -0,0 +1,71 @@
+import sys
+sys.path.insert(0, "../src")
+
+import songs
+from sim_hardware import SimHardwareManager
+from game_engine import RhythmGame
+from audio import song_midi, midi_key
+
+# synthio backend pieces that run on a PC (python3 audio_test.py): the
+# MIDI stream handed to synthio.MidiTrack must put every note on and off
+# at the same ms the PWM path would.
+
+
+def decode_midi(data):
+    # -> [(ms, status, key)]
+    events = []
+    t = 0
+    i = 0
+    while i < len(data):
+        delta = 0
+        while True:
+            b = data[i]
+            i += 1
+            delta = (delta << 7) | (b & 0x7F)
+            if not b & 0x80:
+                break
+        t += delta
+        events.append((t, data[i], data[i + 1]))
+        i += 3
+    return events
+
+
+def test_song_midi_matches_event_path():
+    for level in range(1, songs.level_count() + 1):
+        hw = SimHardwareManager(record_frames=False)
+        game = RhythmGame(hw, songs.get_level_data(level))
+        delay = game.start_delay
+        events = decode_midi(song_midi(game._song_notes(), delay))
+
+        expected = []
+        for start, length, freq, freq2 in game._song_notes():
+            keys = [midi_key(f) for f in (freq, freq2) if f]
+            expected += [(delay + start, 0x90, k) for k in keys]
+            expected += [(delay + start + length, 0x80, k) for k in keys]
+        assert events == expected, level
+
+        chords = sum(1 for f in game.tl_freq2 if f)
+        print(f"Level {level:2d}: {len(events)} MIDI events, {chords} chords, "
+              f"{len(song_midi(game._song_notes(), delay))} bytes")
+
+
+def test_midi_keys():
+    assert midi_key(440) == 69
+    assert midi_key(262) == 60
+    assert midi_key(784) == 79
+    # Two-voice chord: both keys on, then both off
+    assert decode_midi(song_midi([(0, 100, 440, 660)], 0)) == [
+        (0, 0x90, 69), (0, 0x90, 76), (100, 0x80, 69), (100, 0x80, 76)]
+    # Long gaps need multi-byte deltas
+    assert decode_midi(song_midi([(20000, 100, 440, 0)], 2000)) == [(22000, 0x90, 69), (22100, 0x80, 69)]
+
+
+def run_audio_test():
+    print("=== synthio song stream ===")
+    test_midi_keys()
+    test_song_midi_matches_event_path()
+    print("All audio tests passed")
+
+
+if __name__ == "__main__":
+    run_audio_test()
@@ -0,0 +1,54 @@
+import sys
+sys.path.insert(0, "../src")
+
+import settings
+from calibration import CalibrationStore, CAL_SIZE
+from highscores import HighScoreManager, ScoreBoard
+
+# Cached sensor calibration on a PC (python3 calibration_test.py): round
+# trip, validity stamp, and no flash write when nothing changed.
+
+
+class CountingNVM(bytearray):
+    def __init__(self, size=settings.NVM_SIZE):
+        super().__init__(size)
+        self.writes = 0
+
+    def __setitem__(self, index, value):
+        self.writes += 1
+        super().__setitem__(index, value)
+
+
+def test_round_trip_and_stamp():
+    nvm = CountingNVM()
+    store = CalibrationStore(nvm)
+    assert store.load() is None
+
+    store.save(0.25, [20100, 19950, 20400, 20010])
+    accel_x, baselines = store.load()
+    assert accel_x == 0.25 and baselines == [20100, 19950, 20400, 20010]
+
+    store.save(0.25, [20100, 19950, 20400, 20010])
+    assert nvm.writes == 1
+
+    # A flipped bit fails the CRC: boot calibrates from scratch
+    nvm[settings.NVM_CALIBRATION + 7] ^= 0x10
+    assert store.load() is None
+
+
+def test_layout():
+    # Between the level boards and the replay
+    last_board = HighScoreManager.board_offset(settings.MAX_GAME_LEVELS, len(settings.DIFFICULTY_NAMES) - 1)
+    assert last_board + ScoreBoard.BOARD_SIZE <= settings.NVM_CALIBRATION
+    assert settings.NVM_CALIBRATION + CAL_SIZE <= settings.NVM_REPLAY
+
+
+def run_calibration_test():
+    print("=== Calibration cache ===")
+    test_round_trip_and_stamp()
+    test_layout()
+    print("All calibration tests passed")
+
+
+if __name__ == "__main__":
+    run_calibration_test()
@@ -0,0 +1,254 @@
+"""
+RhythmGame.update() cost for every level and difficulty, on the host
+simulator (python3 engine_bench.py). Every note is pressed on time.
+
+  update_us          wall time per update() call: p50 / p99 / max,
+                     each frame's best of REPEATS identical runs
+  alloc_bytes        heap allocated inside one update() (tracemalloc peak)
+  judge_latency_ms   virtual time from a scripted press to its judgement
+
+--out FILE writes the results as JSON; --compare FILE checks them
+against an earlier run of the same mode and exits 1 if any case got
+slower.
+
+--render instead compares the two LED render paths, timing only
+_update_visuals() per case: notes placed every frame ("direct") versus
+the precomputed keyframe track ("keyframes", led_track.py), plus the
+track's RAM cost.
+"""
+import sys
+sys.path.insert(0, "../src")
+
+import json
+import time
+import tracemalloc
+import settings
+import songs
+from sim_hardware import SimHardwareManager
+from game_engine import RhythmGame
+
+FRAME_MS = 3            # virtual time between update() calls
+REPEATS = 3             # timing passes; each frame keeps its fastest run
+REGRESSION_RATIO = 1.2  # flag stats more than 20% above the baseline...
+REGRESSION_CHECKS = {   # ...and by at least min_delta: metric -> (stats, min_delta)
+    "update_us": (("p50", "p99"), 10),   # max is mostly host noise
+    "alloc_bytes": (("mean", "max"), 64),
+    "judge_latency_ms": (("p50", "p99", "max"), 1),
+}
+RENDER_REGRESSION_CHECKS = {   # the same for --render; its p99 is mostly timer noise
+    "direct": (("mean",), 3),
+    "keyframes": (("mean",), 3),
+}
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": 0, "p99": 0, "max": 0}
+    values = sorted(values)
+    last = len(values) - 1
+    return {
+        "p50": values[last * 50 // 100],
+        "p99": values[last * 99 // 100],
+        "max": values[last],
+    }
+
+
+def new_game(level, difficulty, led_keyframes=settings.LED_KEYFRAMES):
+    hw = SimHardwareManager(record_frames=False)
+    game = RhythmGame(hw, songs.get_level_data(level), difficulty, led_keyframes)
+    game.start()
+    hw.autoplay(game)
+    return hw, game
+
+
+def time_updates(level, difficulty, frame_ms):
+    hw, game = new_game(level, difficulty)
+    latencies = []
+
+    def on_judge(move, index, hit_type):
+        pressed = game.start_time + game.tl_target[index]
+        latencies.append(hw.ticks_ms() - pressed)
+    game.on_judge = on_judge
+
+    costs = []
+    clock = time.perf_counter_ns
+    while not game.is_won:
+        t0 = clock()
+        game.update()
+        costs.append((clock() - t0) // 1000)
+        hw.clock.advance_us(frame_ms * 1000)
+    return game, costs, latencies
+
+
+def trace_allocations(level, difficulty, frame_ms):
+    hw, game = new_game(level, difficulty)
+    sizes = []
+    tracemalloc.start()
+    while not game.is_won:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        game.update()
+        sizes.append(tracemalloc.get_traced_memory()[1] - before)
+        hw.clock.advance_us(frame_ms * 1000)
+    tracemalloc.stop()
+    return sizes
+
+
+def bench_case(level, difficulty, frame_ms=FRAME_MS):
+    # The sim is deterministic, so every pass sees the same frames
+    game, costs, latencies = time_updates(level, difficulty, frame_ms)
+    for _ in range(REPEATS - 1):
+        costs = list(map(min, costs, time_updates(level, difficulty, frame_ms)[1]))
+    sizes = trace_allocations(level, difficulty, frame_ms)
+    return {
+        "level": level,
+        "difficulty": settings.DIFFICULTY_NAMES[difficulty],
+        "notes": game.num_steps,
+        "notes_per_s": round(game.num_steps * 1000 / game.total_duration, 2),
+        "frames": len(costs),
+        "score": game.score,
+        "update_us": percentiles(costs),
+        "alloc_bytes": {
+            "mean": round(sum(sizes) / len(sizes), 1),
+            "max": max(sizes),
+        },
+        "judge_latency_ms": percentiles(latencies),
+    }
+
+
+def time_render(level, difficulty, frame_ms, led_keyframes):
+    hw, game = new_game(level, difficulty, led_keyframes)
+    costs = []
+    clock = time.perf_counter_ns
+    draw = game._update_visuals
+
+    def timed_draw(song_time):
+        t0 = clock()
+        draw(song_time)
+        costs.append((clock() - t0) // 1000)
+    game._update_visuals = timed_draw
+
+    while not game.is_won:
+        game.update()
+        hw.clock.advance_us(frame_ms * 1000)
+    return game, costs
+
+
+def bench_render(level, difficulty, frame_ms=FRAME_MS):
+    case = {"level": level, "difficulty": settings.DIFFICULTY_NAMES[difficulty]}
+    for name, led_keyframes in (("direct", False), ("keyframes", True)):
+        game, costs = time_render(level, difficulty, frame_ms, led_keyframes)
+        for _ in range(REPEATS - 1):
+            costs = list(map(min, costs, time_render(level, difficulty, frame_ms, led_keyframes)[1]))
+        case[name] = percentiles(costs)
+        case[name]["mean"] = round(sum(costs) / len(costs), 1)
+        if led_keyframes:
+            case["keyframes"]["count"] = game.led_track.count
+            case["keyframes"]["bytes"] = game.led_track.size_bytes()
+    return case
+
+
+def run_render_bench(frame_ms=FRAME_MS, levels=None):
+    if levels is None:
+        levels = range(1, songs.level_count() + 1)
+
+    real_stdout = sys.stdout
+    results = {}
+    for level in levels:
+        for difficulty in range(len(settings.DIFFICULTY_NAMES)):
+            sys.stdout = None
+            try:
+                case = bench_render(level, difficulty, frame_ms)
+            finally:
+                sys.stdout = real_stdout
+            name = f"L{level:02d}-{case['difficulty']}"
+            results[name] = case
+            d = case["direct"]
+            k = case["keyframes"]
+            print(f"{name:<10} direct mean={d['mean']:5.1f}us p99={d['p99']:3d}us  "
+                  f"keyframes mean={k['mean']:5.1f}us p99={k['p99']:3d}us  "
+                  f"track={k['count']:4d} kf {k['bytes']:5d}B")
+    return {"frame_ms": frame_ms, "render": results}
+
+
+def run_engine_bench(frame_ms=FRAME_MS, levels=None):
+    if levels is None:
+        levels = range(1, songs.level_count() + 1)
+
+    # Judgement prints would dominate the timings
+    real_stdout = sys.stdout
+    results = {}
+    for level in levels:
+        for difficulty in range(len(settings.DIFFICULTY_NAMES)):
+            sys.stdout = None
+            try:
+                case = bench_case(level, difficulty, frame_ms)
+            finally:
+                sys.stdout = real_stdout
+            name = f"L{level:02d}-{case['difficulty']}"
+            results[name] = case
+            u = case["update_us"]
+            a = case["alloc_bytes"]
+            j = case["judge_latency_ms"]
+            print(f"{name:<10} notes={case['notes']:3d} ({case['notes_per_s']:.1f}/s) "
+                  f"update p50={u['p50']:4d}us p99={u['p99']:4d}us max={u['max']:5d}us  "
+                  f"alloc mean={a['mean']:6.1f}B max={a['max']:5d}B  "
+                  f"judge p50={j['p50']}ms max={j['max']}ms")
+    return {"frame_ms": frame_ms, "cases": results}
+
+
+def compare(results, baseline, section="cases"):
+    checks = RENDER_REGRESSION_CHECKS if section == "render" else REGRESSION_CHECKS
+    regressions = []
+    for name, case in results[section].items():
+        old = baseline[section].get(name)
+        if old is None:
+            continue
+        for metric, (stats, min_delta) in checks.items():
+            for stat in stats:
+                value = case[metric][stat]
+                was = old[metric][stat]
+                if value > was * REGRESSION_RATIO and value - was >= min_delta:
+                    regressions.append(f"{name} {metric}.{stat}: {was} -> {value}")
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON to check against")
+    parser.add_argument("--frame-ms", type=int, default=FRAME_MS)
+    parser.add_argument("--level", type=int, action="append",
+                        help="only this level (repeatable)")
+    parser.add_argument("--render", action="store_true",
+                        help="compare the LED render paths instead")
+    args = parser.parse_args()
+
+    if args.render:
+        print("=== LED Render Paths ===")
+        results = run_render_bench(args.frame_ms, args.level)
+        section = "render"
+    else:
+        print("=== Engine Benchmark ===")
+        results = run_engine_bench(args.frame_ms, args.level)
+        section = "cases"
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print(f"Wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if section not in baseline:
+            parser.error(f"{args.compare} has no '{section}' results")
+        regressions = compare(results, baseline, section)
+        for line in regressions:
+            print("REGRESSION", line)
+        print(f"{len(regressions)} regression(s) against {args.compare}")
+        if regressions:
+            sys.exit(1)
@@ -2,7 +2,9 @@ import time
 import board
 import settings
 import songs
+from song_library import SONG_LIBRARY
 from hardware import HardwareManager
+from lane_map import snake_index
 
 # --- 0. 视觉颜色定义 (根据你的要求优化) ---
 COLOR_NICE_GREEN = (30, 255, 30)    # 更饱和的绿色 (Touch)
@@ -21,20 +23,6 @@ GRADIENT_BLUE = [
     # Track 3: 浅蓝/白蓝 (全亮度)
     (180, 240, 255)  
 ]
-def get_physical_index(track_idx, vis_pos):
-    """
-    蛇形走线映射逻辑：
-    Track 0 (0-6): 正向
-    Track 1 (7-13): 反向 (13-pos)
-    Track 2 (14-20): 正向
-    Track 3 (21-27): 反向 (27-pos)
-    """
-    if track_idx == 0: return 0 + vis_pos
-    if track_idx == 1: return 13 - vis_pos
-    if track_idx == 2: return 14 + vis_pos
-    if track_idx == 3: return 27 - vis_pos
-    return -1
-
 def draw_visuals_test(hw, timeline, current_time, look_ahead=1.4):
     """
     模拟游戏引擎的绘制逻辑，测试灯带映射和颜色。
@@ -57,8 +45,8 @@ def draw_visuals_test(hw, timeline, current_time, look_ahead=1.4):
             
             # 1. 特殊动作：全轨道显示
             if move_id in [settings.MOVE_TAP, settings.MOVE_LEFT, settings.MOVE_RIGHT]:
-                for t_idx in range(4):
-                    phys_idx = get_physical_index(t_idx, local_pos)
+                for t_idx in range(settings.LED_ROWS):
+                    phys_idx = snake_index(t_idx, local_pos)
                     
                     color = COLOR_NICE_RED # Default Tap
                     
@@ -77,7 +65,7 @@ def draw_visuals_test(hw, timeline, current_time, look_ahead=1.4):
                 if move_id == settings.MOVE_TOUCH_3: target_track = 2
                 if move_id == settings.MOVE_TOUCH_4: target_track = 3
                 
-                phys_idx = get_physical_index(target_track, local_pos)
+                phys_idx = snake_index(target_track, local_pos)
                 if 0 <= phys_idx < settings.NUM_PIXELS:
                     hw.pixels[phys_idx] = COLOR_NICE_GREEN
 
@@ -88,6 +76,7 @@ def run_hardware_test():
     
     # 1. 初始化硬件
     hw = HardwareManager()
+    hw.start_sensors()  # the accelerometer is otherwise started before the first level
     
     # 2. 测试 OLED 显示
     print("\n[Test 1] Display Test...")
@@ -147,7 +136,7 @@ def run_hardware_test():
     ])
     
     # 预处理乐谱 (转换为绝对时间)
-    raw_song = songs.SONG_LIBRARY[0] # Twinkle Star
+    raw_song = SONG_LIBRARY[0] # Twinkle Star
     timeline = []
     curr_t = 0.0
     bpm = raw_song["bpm_scale"]
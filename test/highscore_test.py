@@ -0,0 +1,160 @@
+import sys
+sys.path.insert(0, "../src")
+
+import struct
+import settings
+from highscores import HighScoreManager, ScoreBoard
+
+# NVM high score tables on a PC (python3 highscore_test.py): sorted RAM
+# cache, minimal writes, surviving a power cut at any point of a save,
+# and the per (level, difficulty) board layout.
+
+
+class FlashNVM(bytearray):
+    """bytearray NVM that counts accesses and can lose power after N writes."""
+    def __init__(self, size=settings.NVM_SIZE):
+        super().__init__(size)
+        self.reads = 0
+        self.writes_left = None
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return super().__getitem__(index)
+
+    def __setitem__(self, index, value):
+        if self.writes_left is not None:
+            if self.writes_left == 0:
+                raise OSError("power lost")
+            self.writes_left -= 1
+        super().__setitem__(index, value)
+
+
+def reference_top(scores):
+    table = [HighScoreManager.DEFAULT_ENTRY] * settings.NUM_HIGHSCORES
+    for entry in scores:
+        table.append(entry)
+        table.sort(key=lambda x: x[1], reverse=True)
+        table = table[:settings.NUM_HIGHSCORES]
+    return [s for _, s in table]
+
+
+RUNS = [("AAA", 250), ("BBB", 90), ("CCC", 400), ("DDD", 120), ("EEE", 400),
+        ("FFF", 101), ("GGG", 999), ("HHH", 50), ("III", 300), ("JJJ", 130)]
+
+
+def test_sorted_and_minimal_writes():
+    nvm = FlashNVM()
+    hs = HighScoreManager(nvm)
+    added = []
+    for name, score in RUNS:
+        before = hs.overall.nvm_writes
+        made_it = hs.add_score(name, score)
+        writes = hs.overall.nvm_writes - before
+        added.append((name, score))
+        assert [s for _, s in hs.get_high_scores()] == reference_top(added)
+        if made_it:
+            # The header plus at most two changed records (this save and the
+            # previous one, which the older bank hasn't seen)
+            assert 2 <= writes <= 3, writes
+        else:
+            assert writes == 0
+
+    reads = nvm.reads
+    for _ in range(10):
+        hs.get_high_scores()
+    assert nvm.reads == reads
+
+    reloaded = HighScoreManager(nvm)
+    assert reloaded.get_high_scores() == hs.get_high_scores()
+    print(f"Top {settings.NUM_HIGHSCORES}: {hs.get_high_scores()}")
+
+
+def test_power_loss_during_save():
+    # Cut the power after every possible number of writes: the table read
+    # back is always either the old or the new one
+    for cut in range(4):
+        nvm = FlashNVM()
+        hs = HighScoreManager(nvm)
+        for name, score in RUNS[:4]:
+            hs.add_score(name, score)
+        old = list(hs.get_high_scores())
+
+        nvm.writes_left = cut
+        try:
+            hs.add_score("NEW", 777)
+            completed = True
+        except OSError:
+            completed = False
+        nvm.writes_left = None
+
+        table = HighScoreManager(nvm).get_high_scores()
+        if completed:
+            assert ("NEW", 777) in table
+        else:
+            assert table == old, (cut, table)
+
+
+def test_legacy_table_migrated():
+    nvm = FlashNVM()
+    nvm[0:2] = ScoreBoard.LEGACY_HEADER
+    legacy = [("OLD", 500), ("ABC", 40), ("XYZ", 320), ("GIX", 100), ("GIX", 100), ("QQQ", 7)]
+    for i, (name, score) in enumerate(legacy):
+        o = 2 + i * ScoreBoard.LEGACY_ENTRY_SIZE
+        nvm[o:o + 7] = struct.pack('<3sI', name.encode(), score)
+
+    hs = HighScoreManager(nvm)
+    assert hs.get_high_scores()[0] == ("OLD", 500)
+    assert [s for _, s in hs.get_high_scores()] == sorted([s for _, s in legacy], reverse=True)
+
+
+def test_corrupt_record_detected():
+    nvm = FlashNVM()
+    hs = HighScoreManager(nvm)
+    hs.add_score("AAA", 250)
+    # Flip a score byte in the newest bank: its bank CRC fails, so the
+    # previous bank is used instead
+    board = hs.overall
+    base = board.offset + board.active * board.BANK_SIZE + board.HEADER_SIZE
+    nvm[base + 4] ^= 0xFF
+    table = HighScoreManager(nvm).get_high_scores()
+    assert ("AAA", 250) not in table
+    assert table[0] == HighScoreManager.DEFAULT_ENTRY
+
+
+def test_level_boards():
+    # All boards fit between the overall board and the replay
+    last = HighScoreManager.board_offset(settings.MAX_GAME_LEVELS, len(settings.DIFFICULTY_NAMES) - 1)
+    assert settings.NVM_BOARDS >= settings.NVM_HIGHSCORES + ScoreBoard.BOARD_SIZE
+    assert last + ScoreBoard.BOARD_SIZE <= settings.NVM_REPLAY
+
+    nvm = FlashNVM()
+    hs = HighScoreManager(nvm)
+    hs.board(3, 1).add_score("AAA", 250)
+    hs.board(10, 2).add_score("BBB", 900)
+    hs.add_score("CCC", 1500)
+
+    # Opening a board reads its two banks only, and writes nothing
+    hs = HighScoreManager(nvm)
+    reads = nvm.reads
+    nvm.writes_left = 0
+    board = hs.board(3, 1)
+    assert nvm.reads - reads == 2
+    assert board.get_high_scores()[0] == ("AAA", 250)
+    assert hs.board(3, 0).get_high_scores()[0] == ("---", 0)
+    assert hs.board(10, 2).get_high_scores()[0] == ("BBB", 900)
+    assert hs.get_high_scores()[0] == ("CCC", 1500)
+    nvm.writes_left = None
+
+
+def run_highscore_test():
+    print("=== High score NVM store ===")
+    test_sorted_and_minimal_writes()
+    test_power_loss_during_save()
+    test_legacy_table_migrated()
+    test_corrupt_record_detected()
+    test_level_boards()
+    print("All high score tests passed")
+
+
+if __name__ == "__main__":
+    run_highscore_test()
@@ -0,0 +1,218 @@
+import sys
+sys.path.insert(0, "../src")
+
+import time
+import settings
+import songs
+from sim_hardware import SimHardwareManager, run_app
+from game_engine import RhythmGame
+from code import GameApp, STATE_GAME_OVER, STATE_MENU_LEVEL
+
+# Runs the game on the headless backend (python3 sim_test.py on a PC).
+
+
+def test_full_library_autoplay():
+    # Every note pressed on time. Only tilts can be lost, to the
+    # accelerometer cooldown (ADXL_TILT_COOLDOWN)
+    tilts = (1 << settings.MOVE_LEFT) | (1 << settings.MOVE_RIGHT)
+    for level in range(1, songs.level_count() + 1):
+        for difficulty in range(len(settings.DIFFICULTY_NAMES)):
+            hw = SimHardwareManager(record_frames=False)
+            game = RhythmGame(hw, songs.get_level_data(level), difficulty)
+            game.start()
+            hw.autoplay(game)
+            hw.run_game(game)
+            assert game.is_won
+            for i in range(game.num_steps):
+                if game.tl_status[i] == settings.HIT_MISS:
+                    assert game.tl_moves[i] & tilts, (level, difficulty, i)
+            assert hw.buzzer_log and hw.buzzer_log[-1][1] == 0
+
+
+def test_overlapping_windows():
+    # HARD eighth notes are 140 ms apart with +/-112 ms windows: an early
+    # press for a note lands while the previous note's window is open,
+    # and must still be judged against the note it is closest to
+    hw = SimHardwareManager(record_frames=False)
+    game = RhythmGame(hw, songs.get_level_data(4), settings.DIFFICULTY_HARD)
+    game.start()
+    notes = [i for i in range(game.num_steps) if game.tl_moves[i]]
+    # Touch notes only: tilts can be lost to the sensor cooldown
+    touches = sum(1 << m for m in range(settings.MOVE_TOUCH_1, settings.MOVE_TOUCH_4 + 1))
+    early = [b for a, b in zip(notes, notes[1:])
+             if game.tl_target[b] - game.tl_target[a] < game.good_window
+             + game.perfect_window and game.tl_moves[a] != game.tl_moves[b]
+             and not game.tl_moves[b] & ~touches]
+    assert early
+    offsets = {b: -game.perfect_window - 1 for b in early}
+    for i in notes:
+        at = game.start_time + game.tl_target[i] + offsets.get(i, 0)
+        move_id = 1
+        while game.tl_moves[i] >> move_id:
+            if (game.tl_moves[i] >> move_id) & 1:
+                hw.press_move(move_id, at)
+            move_id += 1
+    hw.run_game(game)
+
+    for i in early:
+        assert game.tl_status[i] == settings.HIT_HIT, i
+
+
+def test_late_tilt_through_fifo():
+    # Tilts come in up to a FIFO poll after they were sampled; one sampled
+    # late in its window must still hit, whichever poll it comes in on
+    for fifo_delay in (False, True):
+        hw = SimHardwareManager(record_frames=False, fifo_delay=fifo_delay)
+        game = RhythmGame(hw, songs.get_level_data(1), settings.DIFFICULTY_HARD)
+        game.start()
+        late = {}   # note -> tilt, spaced out past the sensor cooldown
+        last = -settings.ADXL_TILT_COOLDOWN
+        for i in range(game.num_steps):
+            for move in (settings.MOVE_LEFT, settings.MOVE_RIGHT):
+                if game.tl_moves[i] == 1 << move and game.tl_target[i] - last > settings.ADXL_TILT_COOLDOWN:
+                    late[i] = move
+                    last = game.tl_target[i]
+        assert len(late) > 1
+        for i, move in late.items():
+            hw.press_move(move, game.start_time + game.tl_target[i] + game.good_window - 10)
+        hw.run_game(game)
+
+        for i in late:
+            assert game.tl_status[i] == settings.HIT_HIT, (fifo_delay, i)
+
+
+def test_visible_window():
+    # The LED window holds exactly the unjudged notes inside the lookahead
+    for level, difficulty in ((4, settings.DIFFICULTY_HARD), (1, settings.DIFFICULTY_EASY)):
+        hw = SimHardwareManager(record_frames=False)
+        game = RhythmGame(hw, songs.get_level_data(level), difficulty)
+        game.start()
+        hw.autoplay(game, (0, 40, -80))
+        update_visuals = game._update_visuals
+
+        def checked(song_time):
+            update_visuals(song_time)
+            window = [i for i in range(game.vis_start, game.vis_end) if game.tl_moves[i]]
+            visible = [i for i in range(game.num_steps) if game.tl_moves[i]
+                       and 0 <= game.tl_target[i] - song_time <= game.look_ahead_time]
+            assert window == visible, (song_time, window, visible)
+
+        game._update_visuals = checked
+        hw.run_game(game)
+
+
+def test_keyframe_render():
+    # The precomputed LED track shows the same frames, hits masked included
+    for level, difficulty in ((10, settings.DIFFICULTY_HARD), (2, settings.DIFFICULTY_EASY)):
+        frames = []
+        for led_keyframes in (False, True):
+            hw = SimHardwareManager()
+            game = RhythmGame(hw, songs.get_level_data(level), difficulty, led_keyframes)
+            game.start()
+            hw.autoplay(game, (0, 40, -80))
+            hw.run_game(game)
+            frames.append(hw.pixels.frames)
+        assert frames[0] == frames[1], (level, difficulty)
+
+
+def test_profiling_overlay_cleared():
+    # The overlay goes away in the next song once profiling is off
+    hw = SimHardwareManager(record_frames=False)
+    for profiling in (True, False):
+        hw.set_profiling(profiling)
+        game = RhythmGame(hw, songs.get_level_data(1), settings.DIFFICULTY_EASY)
+        game.start()
+        hw.autoplay(game, (0,))
+        hw.run_game(game)
+        debug = hw.screen_log[-1][1][list(hw.HUD_SLOTS).index('debug')]
+        assert bool(debug) == profiling, debug
+
+    # Slow phases still fit on one line
+    prof = hw._profiler
+    for i in range(len(prof.avg)):
+        prof.avg[i] = 0x3FFFFFFF
+    assert len(prof.overlay_text()) <= 21, prof.overlay_text()
+
+
+def test_app_menus_to_result():
+    hw = SimHardwareManager()
+    app = GameApp(hw=hw, nvm=hw.nvm)
+    # Splash times out, then EASY, then Level 1
+    hw.click(3000)
+    hw.click(4000)
+    run_app(app, 60)
+
+    assert app.state == STATE_GAME_OVER
+    screens = [lines for _, lines in hw.screen_log]
+    assert ['GET READY'] in screens
+    assert screens[-1][0] == "CLEARED!"
+    assert hw.pixels.frames
+    assert hw.buzzer_log
+
+
+def test_countdown_skip():
+    # A press already pending when a countdown digit is queued skips it
+    # before _screen_loop runs; the queued digit isn't drawn over GET READY
+    hw = SimHardwareManager(record_frames=False)
+    app = GameApp(hw=hw, nvm=hw.nvm)
+    wait_input = app.wait_input
+
+    async def pending_press(timeout=None):
+        if app.pending_layers and app.pending_layers[-1]['text'] == "2":
+            return 0, 1
+        return await wait_input(timeout)
+    app.wait_input = pending_press
+    hw.click(3000)
+    hw.click(4000)
+    run_app(app, 8)
+
+    screens = [lines for _, lines in hw.screen_log]
+    ready = screens.index(['GET READY'])
+    assert all(lines[0] != "Level 1" for lines in screens[ready:]), screens[ready:]
+
+
+def test_menu_scroll_with_beeps():
+    # Beeps play while the knob is read, and a step turned in the same
+    # poll as the press still moves the selection (EASY -> NORMAL -> HARD)
+    hw = SimHardwareManager(record_frames=False)
+    app = GameApp(hw=hw, nvm=hw.nvm)
+    hw.turn(1, 3000)
+    hw.turn(1, 3100)
+    hw.click(3100)
+    run_app(app, 4)
+
+    assert app.state == STATE_MENU_LEVEL
+    assert app.difficulty == settings.DIFFICULTY_HARD
+    beeps = [(ms, f) for ms, f in hw.buzzer_log if ms >= 3000]
+    # Tones move along every input poll, so they end within one poll
+    poll_ms = round(settings.INPUT_POLL_INTERVAL * 1000)
+    assert beeps[0][1] == 880 and beeps[1][1] == 0
+    assert 50 <= beeps[1][0] - beeps[0][0] <= 50 + poll_ms + 1
+    assert beeps[-1][1] == 0
+
+
+def run_sim_test():
+    print("=== Headless simulator ===")
+    start = time.monotonic()
+    test_full_library_autoplay()
+    print(f"Full library autoplay OK ({time.monotonic() - start:.1f}s)")
+    test_overlapping_windows()
+    print("Overlapping judgement windows OK")
+    test_late_tilt_through_fifo()
+    print("Late tilts through the FIFO OK")
+    test_visible_window()
+    print("LED visible window OK")
+    test_keyframe_render()
+    print("LED keyframe track OK")
+    test_profiling_overlay_cleared()
+    print("Profiling overlay cleared OK")
+    test_app_menus_to_result()
+    print("GameApp menus -> level -> result OK")
+    test_countdown_skip()
+    print("Countdown skip OK")
+    test_menu_scroll_with_beeps()
+    print("Menu scrolling with beeps OK")
+
+
+if __name__ == "__main__":
+    run_sim_test()
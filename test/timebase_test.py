@@ -0,0 +1,70 @@
+import sys
+sys.path.insert(0, "../src")
+
+import array
+import settings
+import songs
+from sim_hardware import SimHardwareManager
+from game_engine import RhythmGame
+
+# Judgement must not depend on how long the board has been up.
+# Plays every level with the same scripted presses, once with the clock
+# starting at 0 and once at 48 h, and compares every note's outcome.
+
+UPTIME_48H_MS = 48 * 3600 * 1000
+UPTIME_30D_MS = 30 * 24 * 3600 * 1000   # ticks_ms past 2**31
+
+# Press offsets (ms) cycled over the notes: perfect, good, late miss, early
+PRESS_OFFSETS = (0, 7, -45, 130, 250, -170, 60)
+
+
+def play(level, difficulty, uptime_ms):
+    hw = SimHardwareManager(start_ms=uptime_ms, record_frames=False)
+    game = RhythmGame(hw, songs.get_level_data(level), difficulty)
+    game.start()
+    hw.autoplay(game, PRESS_OFFSETS)
+    hw.run_game(game)
+    return (game.score, game.max_combo, bytes(game.tl_status))
+
+
+def test_judgement_independent_of_uptime():
+    for level in range(1, songs.level_count() + 1):
+        for difficulty in range(len(settings.DIFFICULTY_NAMES)):
+            fresh = play(level, difficulty, 0)
+            aged = play(level, difficulty, UPTIME_48H_MS)
+            assert fresh == aged, (level, difficulty, fresh[:2], aged[:2])
+            print(f"Level {level:2d} {settings.DIFFICULTY_NAMES[difficulty]:<6} "
+                  f"score={fresh[0]:5d} max_combo={fresh[1]:3d} OK")
+
+
+def out_of_device_range(obj):
+    # 'l' / 'L' arrays are 32-bit on CircuitPython (64-bit on most PCs):
+    # names of those holding values that would overflow on the board
+    bad = []
+    for name, value in vars(obj).items():
+        if isinstance(value, array.array) and value.typecode in 'lL' and value:
+            lo, hi = (-2 ** 31, 2 ** 31 - 1) if value.typecode == 'l' else (0, 2 ** 32 - 1)
+            if min(value) < lo or max(value) > hi:
+                bad.append(name)
+    return bad
+
+
+def test_tick_stores_after_30_days():
+    hw = SimHardwareManager(start_ms=UPTIME_30D_MS, record_frames=False)
+    game = RhythmGame(hw, songs.get_level_data(1), settings.DIFFICULTY_HARD)
+    game.start()
+    hw.autoplay(game, PRESS_OFFSETS)
+    hw.run_game(game)
+    for obj in (hw, game, game.events):
+        assert not out_of_device_range(obj), (type(obj).__name__, out_of_device_range(obj))
+
+
+def run_timebase_test():
+    print("=== Timebase: 0 h vs 48 h uptime ===")
+    test_judgement_independent_of_uptime()
+    test_tick_stores_after_30_days()
+    print("All judgements identical")
+
+
+if __name__ == "__main__":
+    run_timebase_test()
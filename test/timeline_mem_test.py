@@ -0,0 +1,62 @@
+import gc
+import settings
+import songs
+from song_library import SONG_LIBRARY
+from game_engine import RhythmGame
+
+# Heap cost of the preprocessed timeline for every level.
+# "dict" rebuilds the old one-dict-per-step layout from song_library for
+# comparison, "array" is RhythmGame streaming the level's binary chart.
+
+def build_dict_timeline(song_data, bpm_scale, good_window):
+    timeline = []
+    current_play_time = 0.0
+    for note_name, duration, move_input in song_data["steps"]:
+        real_duration = duration * bpm_scale
+        if isinstance(move_input, list):
+            moves_set = set(move_input)
+        else:
+            moves_set = {move_input} if move_input != settings.MOVE_NONE else set()
+        timeline.append({
+            "note": note_name,
+            "freq": songs.get_frequency(note_name),
+            "target_time": current_play_time,
+            "duration": real_duration,
+            "win_start": current_play_time - good_window,
+            "win_end": current_play_time + good_window,
+            "required_moves": moves_set,
+            "total_moves_count": len(moves_set),
+            "hit_status": "NONE"
+        })
+        current_play_time += real_duration
+    return timeline
+
+def measure(fn):
+    gc.collect()
+    before = gc.mem_free()
+    obj = fn()
+    gc.collect()
+    used = before - gc.mem_free()
+    del obj
+    gc.collect()
+    return used
+
+def run_timeline_mem_test(difficulty=settings.DIFFICULTY_EASY):
+    print("=== Timeline Heap Usage ===")
+    bpm_scale = settings.BPM[difficulty]
+    good_window = settings.QN * bpm_scale / 2.5
+
+    total_dict = 0
+    total_array = 0
+    for i, song in enumerate(SONG_LIBRARY):
+        dict_bytes = measure(lambda: build_dict_timeline(song, bpm_scale, good_window))
+        array_bytes = measure(lambda: RhythmGame(None, songs.get_level_data(i + 1), difficulty))
+        total_dict += dict_bytes
+        total_array += array_bytes
+        print(f"Level {i+1:2d} {song['title']:<14} steps={len(song['steps']):3d} "
+              f"dict={dict_bytes:6d}B array={array_bytes:6d}B")
+
+    print(f"Total: dict={total_dict}B array={total_array}B")
+
+if __name__ == "__main__":
+    run_timeline_mem_test()
@@ -0,0 +1,75 @@
+import sys
+sys.path.insert(0, "../src")
+
+import settings
+import songs
+from sim_hardware import SimHardwareManager
+from game_engine import RhythmGame
+from timing_wheel import TimingWheel, EV_NOTE_ON, EV_NOTE_OFF
+
+# Timed event queue on a PC (python3 timing_wheel_test.py): time order
+# across buckets, horizon and pool limits, lateness logging, and the
+# buzzer following the chart exactly in the simulator.
+
+
+def test_order_and_lateness():
+    wheel = TimingWheel(slot_ms=8, num_slots=16, capacity=8)
+    wheel.reset(1000)
+    fired = []
+    dispatch = lambda kind, arg: fired.append((kind, arg))
+
+    wheel.schedule(1050, EV_NOTE_OFF, 2)
+    wheel.schedule(1003, EV_NOTE_ON, 1)
+    wheel.schedule(1050, EV_NOTE_ON, 3)   # same time: after the off
+    wheel.schedule(1120, EV_NOTE_ON, 4)   # last bucket before the horizon
+    assert not wheel.schedule(1000 + 8 * 16, EV_NOTE_ON)  # past the horizon
+
+    wheel.fire_due(1002999, dispatch)
+    assert fired == []
+    wheel.fire_due(1003000, dispatch)
+    assert fired == [(EV_NOTE_ON, 1)]
+    wheel.fire_due(1060250, dispatch)     # late pass
+    assert fired[1:] == [(EV_NOTE_OFF, 2), (EV_NOTE_ON, 3)]
+    assert wheel.recent_lateness() == [0, 10250, 10250]
+    wheel.fire_due(1120000, dispatch)
+    assert fired[-1] == (EV_NOTE_ON, 4)
+    assert wheel.pending == 0 and wheel.late_max[EV_NOTE_OFF] == 10250
+
+    # Overdue events fire on the next pass; a full pool refuses more
+    wheel.schedule(1100, EV_NOTE_OFF)
+    for i in range(7):
+        assert wheel.schedule(1140 + i, EV_NOTE_ON, i)
+    assert not wheel.schedule(1150, EV_NOTE_ON)
+    assert wheel.dropped == 2
+    wheel.fire_due(1130000, dispatch)
+    assert fired[-1] == (EV_NOTE_OFF, 0)
+
+
+def test_buzzer_follows_chart():
+    level, difficulty = 1, settings.DIFFICULTY_HARD
+    hw = SimHardwareManager(record_frames=False)
+    game = RhythmGame(hw, songs.get_level_data(level), difficulty)
+    game.start()
+    hw.run_game(game)
+
+    # Every note starts on its target ms, whatever the task rates
+    starts = [ms for ms, freq in hw.buzzer_log if freq]
+    expected = [game.start_time + game.tl_target[i]
+                for i in range(game.num_steps) if game.tl_freq[i]]
+    assert starts[:len(expected)] == expected
+    wheel = game.events
+    assert wheel.dropped == 0
+    assert wheel.fired[EV_NOTE_ON] == len(expected)
+    print(f"{len(expected)} notes, max lateness on={wheel.late_max[EV_NOTE_ON]}us "
+          f"off={wheel.late_max[EV_NOTE_OFF]}us")
+
+
+def run_timing_wheel_test():
+    print("=== Timing wheel event queue ===")
+    test_order_and_lateness()
+    test_buzzer_follows_chart()
+    print("All timing wheel tests passed")
+
+
+if __name__ == "__main__":
+    run_timing_wheel_test()
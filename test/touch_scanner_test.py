@@ -0,0 +1,119 @@
+import sys
+sys.path.insert(0, "../src")
+
+import array
+import settings
+from touch_scanner import TouchScanner
+
+# Touch scanning on a PC (python3 touch_scanner_test.py): hysteresis,
+# baseline tracking and lane-focused scan rates, with pads that just
+# hold a raw_value.
+
+
+class Pad:
+    def __init__(self, raw):
+        self.raw = raw
+        self.reads = 0
+
+    @property
+    def raw_value(self):
+        self.reads += 1
+        return self.raw
+
+
+def make_scanner(raw=20000):
+    pads = [(m, Pad(raw)) for m in range(settings.MOVE_TOUCH_1, settings.MOVE_TOUCH_4 + 1)]
+    return TouchScanner(pads, [raw] * len(pads)), dict(pads)
+
+
+def test_hysteresis_and_baseline():
+    scanner, pads = make_scanner()
+    times = array.array('q', [0] * (settings.MOVE_TAP + 1))
+    pad = pads[settings.MOVE_TOUCH_2]
+    bit = 1 << settings.MOVE_TOUCH_2
+    scanner.set_focus(bit)
+
+    # Slow drift (+1000 over 10 s) is absorbed by the baseline, not
+    # reported as a touch
+    for t in range(0, 10000, 5):
+        pad.raw = 20000 + t // 10
+        assert scanner.scan(t, times) == 0
+    assert scanner.baseline[1] > 20600
+
+    base = scanner.baseline[1]
+    pad.raw = base + settings.TOUCH_MARGIN + 1
+    assert scanner.scan(10020, times) == bit and times[settings.MOVE_TOUCH_2] == 10020
+    # Between the two thresholds: still held, no new edge, baseline frozen
+    pad.raw = base + settings.TOUCH_RELEASE + 1
+    assert scanner.scan(10100, times) == 0
+    pad.raw = base + settings.TOUCH_MARGIN + 1
+    assert scanner.scan(10200, times) == 0
+    pad.raw = base + settings.TOUCH_RELEASE - 1
+    scanner.scan(10300, times)
+    pad.raw = base + settings.TOUCH_MARGIN + 1
+    assert scanner.scan(10400, times) == bit
+    assert scanner.baseline[1] == base
+
+
+def test_slow_press():
+    # A finger landing over tens of ms, read at 1 kHz on a focused pad
+    # (or every TOUCH_IDLE_DIVIDER ms on an idle one), is still a touch
+    for rise, ramp_ms in ((3000, 30), (2000, 20)):
+        for focused in (True, False):
+            scanner, pads = make_scanner()
+            times = array.array('q', [0] * (settings.MOVE_TAP + 1))
+            pad = pads[settings.MOVE_TOUCH_1]
+            bit = 1 << settings.MOVE_TOUCH_1
+            scanner.set_focus(bit if focused else 0)
+            t0 = 1000
+            edges = 0
+            for t in range(t0 - 100, t0 + ramp_ms + 50):
+                pad.raw = 20000 + rise * min(max(t - t0, 0), ramp_ms) // ramp_ms
+                edges |= scanner.scan(t, times)
+            assert edges == bit, (rise, ramp_ms, focused)
+            # At most a step or two toward the finger
+            assert scanner.baseline[0] - 20000 < rise // 32
+
+
+def test_baseline_rate_ignores_focus():
+    # Focused pads are read 4x as often, but baselines step just as fast
+    scanner, pads = make_scanner()
+    times = array.array('q', [0] * (settings.MOVE_TAP + 1))
+    scanner.set_focus(1 << settings.MOVE_TOUCH_1)
+    for pad in pads.values():
+        pad.raw = 20800
+    for t in range(2000):
+        scanner.scan(t, times)
+    assert 20000 < scanner.baseline[0] < 20800
+    assert list(scanner.baseline) == [scanner.baseline[0]] * 4
+
+
+def test_focus_order_and_rate():
+    scanner, pads = make_scanner()
+    times = array.array('q', [0] * (settings.MOVE_TAP + 1))
+    focus = (1 << settings.MOVE_TOUCH_3) | (1 << settings.MOVE_TOUCH_1)
+    scanner.set_focus(focus)
+    assert list(scanner.order) == [0, 2, 1, 3]
+
+    scanner.reset_stats(0)
+    scans = 100 * settings.TOUCH_IDLE_DIVIDER
+    for t in range(scans):
+        scanner.scan(t, times)
+    reads = [pads[m].reads for m in sorted(pads)]
+    assert reads == [scans, scans // settings.TOUCH_IDLE_DIVIDER] * 2
+    # Reported reads per second over the 400 ms run
+    assert scanner.report_lines(scans)[0].startswith("pad1 1000/s")
+    assert scanner.report_lines(scans)[1].startswith("pad2  250/s")
+
+
+def run_touch_scanner_test():
+    print("=== Touch scanner ===")
+    test_hysteresis_and_baseline()
+    test_slow_press()
+    test_baseline_rate_ignores_focus()
+    test_focus_order_and_rate()
+    print("All touch scanner tests passed")
+
+
+if __name__ == "__main__":
+    run_touch_scanner_test()